@@ -1,14 +1,18 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
-import joblib
 import plotly.express as px
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
-import shap
 from sklearn.metrics import confusion_matrix, classification_report, accuracy_score, precision_score, recall_score, f1_score, roc_curve, auc
-from utils.feature_extraction import extract_features
-from utils.traffic_analyzer import TrafficAnalyzer
+from utils.feature_extraction import extract_features_batch, extract_features_parallel, failed_rows, make_extraction_pool
+from utils.feature_cache import FeatureCache
+from utils.traffic_analyzer import ANOMALY_THRESHOLD, BehaviorMonitor, TrafficAnalyzer
+from utils.url_stream import detect_format, open_binary, iter_url_frames
+from utils.scoring import score_urls
+from utils.explanations import format_contributions
+from utils.model_registry import ModelRegistry
+import os
 import warnings
 warnings.filterwarnings('ignore')
 
@@ -572,33 +576,89 @@ FEATURE_NAMES = [
     'Directory_Traversal', 'File_Inclusion', 'Command_Injection'
 ]
 
+# Memory cap of the feature-vector cache shared by all sessions
+FEATURE_CACHE_MAX_MB = 64
+
+# Worker processes for bulk feature extraction (all cores by default)
+EXTRACTION_WORKERS = os.cpu_count() or 1
+
+# URLs read from an uploaded file per streaming block
+STREAM_BLOCK_SIZE = 10000
+
+# Trained forest, its memory-mapped flat export and the cascade prefilter calibrated with it
+MODEL_PATH = "model/rf_model.pkl"
+FLAT_MODEL_PATH = "model/rf_flat.pkl"
+PREFILTER_PATH = "model/prefilter.json"
+
+# Early-exit inference stops a row when its running vote is this confidently settled
+EARLY_EXIT_DELTA = 0.01
+
+# Highest-scoring anomalies listed (with reasons) after a batch run
+ANOMALY_DISPLAY_ROWS = 100
+
+# ========== SHARED RESOURCES ==========
+@st.cache_resource
+def get_feature_cache():
+    return FeatureCache(max_bytes=FEATURE_CACHE_MAX_MB * 1024 * 1024)
+
+@st.cache_resource
+def get_model_registry():
+    # One registry per process: it loads the model once (flat arrays memory-mapped and
+    # shared across processes), builds the SHAP explainer only on demand, and
+    # hot-swaps retrained model files (with their prefilter) in the background
+    return ModelRegistry(
+        MODEL_PATH, FLAT_MODEL_PATH, feature_names=FEATURE_NAMES, early_exit_delta=EARLY_EXIT_DELTA,
+        prefilter_path=PREFILTER_PATH
+    ).start()
+
+@st.cache_resource
+def get_extraction_pool():
+    # One worker pool for the whole server: starting a pool per streamed block would
+    # re-spawn every worker for each 10k URLs. Workers come from a fork server, not a
+    # fork of this threaded process
+    return make_extraction_pool(EXTRACTION_WORKERS)
+
+feature_cache = get_feature_cache()
+extraction_pool = get_extraction_pool()
+model_registry = get_model_registry()
+
+# Snapshot of the live model version: this whole run uses it even if a newer one is swapped in
+active_model = model_registry.current()
+model = active_model.model
+engine = active_model.engine
+prefilter = active_model.prefilter
+
+# Explanation modes offered in the UI
+EXPLANATION_MODES = {
+    "Exact (SHAP)": "exact",
+    "Fast (decision paths)": "fast"
+}
+EXPLANATION_TITLES = {
+    "exact": 'SHAP Feature Impact (Positive = More Malicious)',
+    "fast": 'Decision Path Contributions (Positive = More Malicious)'
+}
+
 # ========== INITIALIZE SESSION STATE ==========
-if 'model' not in st.session_state:
-    st.session_state.model = joblib.load("model/rf_model.pkl")
-    st.session_state.explainer = shap.Explainer(st.session_state.model)
+if 'traffic_analyzer' not in st.session_state:
     st.session_state.traffic_analyzer = TrafficAnalyzer()
 
 # ========== XAI VISUALIZATION FUNCTIONS ==========
-def show_shap_explanation(features):
+def show_shap_explanation(contributions, title=EXPLANATION_TITLES["exact"]):
     try:
-        shap_values = st.session_state.explainer(np.array([features]))
-        if len(shap_values.shape) == 3:
-            shap_values = shap_values[..., 1]
-        
         df = pd.DataFrame({
-            'Feature': FEATURE_NAMES,
-            'SHAP Value': shap_values.values[0],
-            'Color': ['#ef4444' if x > 0 else '#3b82f6' for x in shap_values.values[0]]
-        }).sort_values('SHAP Value', key=abs, ascending=False)
+            'Feature': contributions.features,
+            'SHAP Value': contributions.values,
+            'Color': ['#ef4444' if x > 0 else '#3b82f6' for x in contributions.values]
+        })
         
         fig = px.bar(
-            df.head(15),
+            df,
             x='SHAP Value',
             y='Feature',
             color='Color',
             color_discrete_map='identity',
             orientation='h',
-            title='SHAP Feature Impact (Positive = More Malicious)'
+            title=title
         )
         fig.update_layout(
             height=600,
@@ -670,12 +730,13 @@ with st.sidebar:
     </div>
     """, unsafe_allow_html=True)
 
-    st.markdown("""
+    cache_stats = feature_cache.stats()
+    st.markdown(f"""
     <div class="sidebar-stats">
         <div class="stats-header">📈 System Overview</div>
         <div class="stat-item">
-            <span class="stat-label">🔒 Active Models</span>
-            <span class="stat-value">1</span>
+            <span class="stat-label">🔒 Active Model</span>
+            <span class="stat-value">{active_model.version}</span>
         </div>
         <div class="stat-item">
             <span class="stat-label">⚡ System Status</span>
@@ -685,6 +746,10 @@ with st.sidebar:
             <span class="stat-label">🛡️ Security Level</span>
             <span class="stat-value" style="color: #3b82f6;">High</span>
         </div>
+        <div class="stat-item">
+            <span class="stat-label">🧠 Feature Cache</span>
+            <span class="stat-value">{cache_stats['hit_rate']*100:.0f}% hits</span>
+        </div>
         <div class="stat-item">
             <span class="stat-label">🚀 Version</span>
             <span class="stat-value">v2.1.0</span>
@@ -715,76 +780,73 @@ if analysis_mode == "Real-time URL Analysis":
             height=150,
             placeholder="http://example.com/search?q=test\nhttp://malicious.com?q=<script>alert('xss')</script>"
         )
+        explanation_mode = st.radio("Explanation mode", list(EXPLANATION_MODES), horizontal=True)
         
         if st.button("⚡ Scan URLs", type="primary"):
             if url_input:
                 urls = [url.strip() for url in url_input.split('\n') if url.strip()]
-                results = []
                 
-                progress_bar = st.progress(0)
-                for i, url in enumerate(urls):
+                try:
+                    # All URLs are scored in one batch; features stay in the cache for the explanations
+                    df_results = score_urls(
+                        urls, engine, st.session_state.traffic_analyzer,
+                        extract=feature_cache.extract_many
+                    )[['URL', 'Status', 'Confidence', 'Traffic_Type', 'Risk_Score', 'Model_Version']]
+                    failed = (df_results['Status'] == 'Error').to_numpy()
+                    st.session_state.scan = {'urls': urls, 'results': df_results[~failed], 'mode': explanation_mode,
+                                             'failed': list(dict.fromkeys(df_results['URL'][failed])),
+                                             'explained': [], 'explanations': []}
+                except Exception as e:
+                    st.error(f"Error analyzing URLs: {str(e)}")
+                else:
                     try:
-                        features = extract_features(url)
-                        if features is None or len(features) != len(FEATURE_NAMES):
-                            st.error(f"Feature extraction failed for: {url}")
-                            continue
-                            
-                        pred = st.session_state.model.predict([features])[0]
-                        proba = st.session_state.model.predict_proba([features])[0]
-                        traffic_type = st.session_state.traffic_analyzer.classify_traffic(url)
-                        
-                        results.append({
-                            'URL': url,
-                            'Status': 'Malicious' if pred else 'Safe',
-                            'Confidence': f"{max(proba)*100:.1f}%",
-                            'Traffic_Type': traffic_type,
-                            'Risk_Score': proba[1] if len(proba) > 1 else 0
-                        })
-                        
-                        with st.expander(f"Explanation for {url}", expanded=False):
-                            shap_fig = show_shap_explanation(features)
-                            st.plotly_chart(shap_fig, use_container_width=True)
-                        
+                        # One explainer call for every distinct URL; a chart is only drawn for the URL picked below
+                        explained = list(dict.fromkeys(st.session_state.scan['results']['URL']))
+                        explanation_service = active_model.explanation_service(EXPLANATION_MODES[explanation_mode])
+                        st.session_state.scan['explanations'] = explanation_service.explain(
+                            feature_cache.extract_many(explained))
+                        st.session_state.scan['explained'] = explained
                     except Exception as e:
-                        st.error(f"Error analyzing {url}: {str(e)}")
-                        results.append({
-                            'URL': url,
-                            'Status': 'Error',
-                            'Confidence': '0%',
-                            'Traffic_Type': 'Unknown',
-                            'Risk_Score': 0
-                        })
-                    
-                    progress_bar.progress((i + 1) / len(urls))
-                
-                if results:
-                    df_results = pd.DataFrame(results)
-                    
-                    col1, col2, col3, col4 = st.columns(4)
-                    with col1:
-                        st.metric("Total URLs", len(urls))
-                    with col2:
-                        malicious_count = len(df_results[df_results['Status'] == 'Malicious'])
-                        st.metric("🔴 Threats Detected", malicious_count)
-                    with col3:
-                        benign_count = len(df_results[df_results['Status'] == 'Safe'])
-                        st.metric("🟢 Safe URLs", benign_count)
-                    with col4:
-                        st.metric("Threat Rate", f"{malicious_count/len(urls)*100:.1f}%")
-                    col1, col2 = st.columns(2)
-                    
-                    with col1:
-                        fig = px.pie(df_results, names='Status', 
-                                   title='Threat Distribution',
-                                   color_discrete_map={'Malicious': '#ff4444', 'Safe': '#44ff44'})
-                        st.plotly_chart(fig, use_container_width=True)
-                    
-                    with col2:
-                        fig = px.bar(df_results.groupby('Traffic_Type').size().reset_index(name='Count'),
-                                   x='Traffic_Type', y='Count', title='Traffic Classification')
-                        st.plotly_chart(fig, use_container_width=True)
-                    
-                    st.dataframe(df_results, use_container_width=True)
+                        st.error(f"SHAP explanation error: {str(e)}")
+        
+        scan = st.session_state.get('scan')
+        for url in (scan or {}).get('failed', []):
+            st.error(f"Feature extraction failed for: {url}")
+        if scan is not None and not scan['results'].empty:
+            urls, df_results = scan['urls'], scan['results']
+            
+            col1, col2, col3, col4 = st.columns(4)
+            with col1:
+                st.metric("Total URLs", len(urls))
+            with col2:
+                malicious_count = len(df_results[df_results['Status'] == 'Malicious'])
+                st.metric("🔴 Threats Detected", malicious_count)
+            with col3:
+                benign_count = len(df_results[df_results['Status'] == 'Safe'])
+                st.metric("🟢 Safe URLs", benign_count)
+            with col4:
+                st.metric("Threat Rate", f"{malicious_count/len(urls)*100:.1f}%")
+            col1, col2 = st.columns(2)
+            
+            with col1:
+                fig = px.pie(df_results, names='Status', 
+                           title='Threat Distribution',
+                           color_discrete_map={'Malicious': '#ff4444', 'Safe': '#44ff44'})
+                st.plotly_chart(fig, use_container_width=True)
+            
+            with col2:
+                fig = px.bar(df_results.groupby('Traffic_Type').size().reset_index(name='Count'),
+                           x='Traffic_Type', y='Count', title='Traffic Classification')
+                st.plotly_chart(fig, use_container_width=True)
+            
+            st.dataframe(df_results, use_container_width=True)
+            
+            if scan['explained']:
+                explained = scan['explained']
+                selected = st.selectbox("🔍 Explain URL", range(len(explained)), format_func=lambda i: explained[i])
+                shap_fig = show_shap_explanation(scan['explanations'][selected],
+                                                 title=EXPLANATION_TITLES[EXPLANATION_MODES[scan['mode']]])
+                st.plotly_chart(shap_fig, use_container_width=True)
 
 elif analysis_mode == "Batch File Analysis":
     st.header("📦 Bulk File Processor")
@@ -792,82 +854,157 @@ elif analysis_mode == "Batch File Analysis":
     st.markdown("""
     <div class="upload-section">
         <h3 style="color: #3b82f6; margin-bottom: 1rem;">📤 Upload Your CSV File</h3>
-        <p style="color: #4b5563; margin-bottom: 1rem;">Maximum file size: 200MB | Supported format: CSV</p>
+        <p style="color: #4b5563; margin-bottom: 1rem;">Maximum file size: 200MB | Supported formats: CSV, TXT, GZ</p>
     </div>
     """, unsafe_allow_html=True)
     
-    uploaded_file = st.file_uploader("Choose CSV file", type=["csv"], help="CSV should contain a 'url' column. Maximum file size: 200MB")
+    uploaded_file = st.file_uploader("Choose URL file", type=["csv", "txt", "log", "gz"], help="CSV with a 'url' column, or one URL per line, optionally gzipped. Maximum file size: 200MB")
     
     if uploaded_file is not None:
         try:
             file_size = uploaded_file.size / (1024 * 1024)
+            input_format = detect_format(uploaded_file)
             
             col1, col2, col3 = st.columns(3)
             with col1:
                 st.metric("📄 File Size", f"{file_size:.2f} MB")
             with col2:
-                st.metric("📊 Format", "CSV")
+                st.metric("📊 Format", input_format.upper())
             with col3:
                 st.metric("✅ Status", "Ready")
             
             if file_size > 200:
                 st.error("⚠️ File size exceeds 200MB limit! Please use a smaller file.")
             else:
-                if file_size > 50:
-                    chunk_size = 1000
-                    chunks = []
-                    for chunk in pd.read_csv(uploaded_file, chunksize=chunk_size):
-                        chunks.append(chunk)
-                    df = pd.concat(chunks, ignore_index=True)
+                if input_format == 'csv':
+                    columns = pd.read_csv(open_binary(uploaded_file), nrows=0).columns
+                    uploaded_file.seek(0)
                 else:
-                    df = pd.read_csv(uploaded_file)
+                    columns = ['url']
                 
-                st.success(f"✅ Loaded {len(df):,} URLs successfully!")
+                st.success(f"✅ {uploaded_file.name} ready - URLs are streamed in blocks of {STREAM_BLOCK_SIZE:,}")
                 
-                if 'url' not in df.columns:
+                if 'url' not in columns:
                     st.error("❌ CSV must contain a 'url' column!")
                 else:
+                    explain_threats = st.checkbox(
+                        "🧠 Explain detected threats",
+                        value=True,
+                        help="Add the top contributing features of every malicious URL, "
+                             "computed from the forest's decision paths"
+                    )
+                    use_cascade = prefilter is not None and st.checkbox(
+                        "⚡ Fast prefilter cascade",
+                        help=f"Clear plainly benign URLs without running the full model "
+                             f"(calibrated false-negative budget: {prefilter.fn_budget*100:.2f}%)"
+                    )
+                    use_early_exit = st.checkbox(
+                        "⏱️ Early-exit inference",
+                        help="Stop evaluating trees for a URL once its verdict is settled, "
+                             "spending the full forest only on borderline URLs"
+                    )
+                    flag_anomalies = st.checkbox(
+                        "🚨 Flag traffic anomalies",
+                        value=True,
+                        help="Score every URL for unusual characters, heavy encoding, length, "
+                             "attack keywords and repeated parameter injection"
+                    )
+                    batch_engine = active_model.early_exit_engine if use_early_exit else engine
+                    
                     if st.button("🚀 Process File", type="primary"):
                         progress_bar = st.progress(0)
                         status_text = st.empty()
                         
                         results = []
-                        total_urls = len(df)
-                        batch_size = 100
+                        processed = 0
+                        # Share of the file read before and after the current block
+                        block_span = [0.0, 0.0]
                         
-                        for i, url in enumerate(df['url']):
-                            if i % batch_size == 0 or i == total_urls - 1:
-                                status_text.text(f"🔄 Processing batch {(i//batch_size)+1} - URL {i+1:,}/{total_urls:,}")
-                                progress_bar.progress((i+1)/total_urls)
-                            
+                        def report_extraction(done, total):
+                            # Called as each worker chunk completes
+                            start, end = block_span
+                            progress_bar.progress(start + (end - start) * done / total)
+                            status_text.text(f"🔍 Extracting features - URL {processed + done:,}")
+                        
+                        def extract_block(urls):
+                            return feature_cache.extract_many(
+                                urls,
+                                extract=lambda missing: extract_features_parallel(
+                                    missing, workers=EXTRACTION_WORKERS, pool=extraction_pool,
+                                    progress=report_extraction
+                                )
+                            )
+                        
+                        def explain_malicious(block):
+                            factors = np.full(len(block), '', dtype=object)
+                            malicious = (block['Status'] == 'Malicious').to_numpy()
+                            if malicious.any():
+                                explanations = active_model.explanation_service("fast").explain(
+                                    feature_cache.extract_many(block['URL'][malicious]))
+                                factors[malicious] = [format_contributions(e) for e in explanations]
+                            return factors
+                        
+                        def score_block_anomalies(block):
+                            urls = block['URL'].where(block['URL'].map(lambda u: isinstance(u, str)), '')
+                            anomalies = st.session_state.traffic_analyzer.score_anomalies(urls)
+                            block['Anomaly_Score'] = anomalies.scores
+                            block['Anomaly_Severity'] = anomalies.severity
+                        
+                        # Files with a timestamp column are also watched for bursts per host and path
+                        behavior_monitor = BehaviorMonitor(st.session_state.traffic_analyzer)
+                        behavior_alerts = []
+                        
+                        def watch_behavior(frame, block):
+                            known = frame['url'].map(lambda u: isinstance(u, str)).to_numpy()
+                            behavior_alerts.extend(behavior_monitor.observe_many(
+                                frame['timestamp'][known], frame['url'][known],
+                                suspicious=(block['Status'] == 'Malicious').to_numpy()[known]
+                            ))
+                        
+                        uploaded_file.seek(0)
+                        for frame in iter_url_frames(uploaded_file, block_size=STREAM_BLOCK_SIZE, fmt=input_format):
+                            block_span[:] = [block_span[1], min(uploaded_file.tell()/uploaded_file.size, 1.0)]
                             try:
-                                features = extract_features(url)
-                                pred = st.session_state.model.predict([features])[0]
-                                proba = st.session_state.model.predict_proba([features])[0]
-                                traffic_type = st.session_state.traffic_analyzer.classify_traffic(url)
-                                
-                                results.append({
-                                    'URL': url,
-                                    'Status': 'Malicious' if pred else 'Safe',
-                                    'Confidence': f"{max(proba)*100:.1f}%",
-                                    'Traffic_Type': traffic_type,
-                                    'Risk_Score': proba[1] if len(proba) > 1 else 0
-                                })
-                                
+                                block = score_urls(
+                                    frame['url'], batch_engine,
+                                    st.session_state.traffic_analyzer, extract=extract_block,
+                                    prefilter=prefilter if use_cascade else None
+                                )
+                                if explain_threats:
+                                    block['Top_Factors'] = explain_malicious(block)
+                                if flag_anomalies:
+                                    score_block_anomalies(block)
+                                if 'timestamp' in frame:
+                                    watch_behavior(frame, block)
+                                results.append(block)
                             except Exception as e:
-                                st.warning(f"Error processing URL {url}: {str(e)}")
-                                results.append({
-                                    'URL': url,
+                                st.warning(f"Error processing URLs {processed+1:,}-{processed+len(frame):,}: {str(e)}")
+                                results.append(pd.DataFrame({
+                                    'URL': frame['url'],
                                     'Status': 'Error',
                                     'Confidence': '0%',
                                     'Traffic_Type': 'Unknown',
-                                    'Risk_Score': 0
-                                })
+                                    'Risk_Score': 0,
+                                    'Model_Version': batch_engine.version
+                                }))
+                            
+                            processed += len(frame)
+                            status_text.text(f"🔄 Scored {processed:,} URLs")
+                            progress_bar.progress(block_span[1])
                         
                         status_text.text(f"✅ Processing complete! Displaying results...")
                         progress_bar.progress(1.0)
                         
-                        df_results = pd.DataFrame(results)
+                        df_results = pd.concat(results, ignore_index=True)
+                        
+                        # Counted from this run's own rows: the engine is shared by every session
+                        trees_used = df_results.get('Trees_Used', pd.Series(dtype=float))
+                        trees_used = trees_used[trees_used > 0]
+                        if use_early_exit and len(trees_used):
+                            n_trees = batch_engine.fast_model.n_estimators
+                            st.info(f"⏱️ Early exit used {trees_used.mean():.1f} "
+                                    f"of {n_trees} trees per URL on average")
+                        df_results['Occurrences'] = df_results.groupby('URL', dropna=False)['URL'].transform('size')
                         
                         col1, col2, col3, col4 = st.columns(4)
                         with col1:
@@ -900,6 +1037,30 @@ elif analysis_mode == "Batch File Analysis":
                                    color='Status', title='Threats by Traffic Type')
                         st.plotly_chart(fig, use_container_width=True)
                         
+                        if flag_anomalies and 'Anomaly_Score' in df_results:
+                            st.subheader("🚨 Traffic Anomalies")
+                            flagged = df_results[df_results['Anomaly_Score'] >= ANOMALY_THRESHOLD]
+                            col1, col2, col3 = st.columns(3)
+                            for col, severity in zip((col1, col2, col3), ('High', 'Medium', 'Low')):
+                                with col:
+                                    st.metric(f"{severity} severity", f"{(flagged['Anomaly_Severity'] == severity).sum():,}")
+                            if len(flagged):
+                                # Reasons are only spelled out for the rows shown
+                                top = flagged.drop_duplicates('URL').nlargest(ANOMALY_DISPLAY_ROWS, 'Anomaly_Score')
+                                top = top[['URL', 'Anomaly_Score', 'Anomaly_Severity', 'Status']].copy()
+                                top['Reasons'] = [
+                                    '; '.join(st.session_state.traffic_analyzer.anomaly_reasons(u)) for u in top['URL']
+                                ]
+                                st.dataframe(top, use_container_width=True)
+                        
+                        if behavior_alerts:
+                            st.subheader("🕒 Behavioral Bursts")
+                            df_alerts = pd.DataFrame(behavior_alerts)
+                            df_alerts['timestamp'] = pd.to_datetime(df_alerts['timestamp'], unit='s', utc=True)
+                            st.warning(f"⚠️ {len(df_alerts):,} burst alerts across "
+                                       f"{df_alerts[['scope', 'key']].drop_duplicates().shape[0]:,} hosts and paths")
+                            st.dataframe(df_alerts, use_container_width=True)
+                        
                         st.subheader("📊 Detailed Results")
                         st.dataframe(df_results, use_container_width=True)
                         
@@ -920,10 +1081,12 @@ elif analysis_mode == "Model Performance":
     if st.button("🔄 Generate Analytics Report"):
         test_df = pd.read_csv("sample_http.csv")
         
-        X_test = [extract_features(url) for url in test_df["url"]]
-        y_true = test_df["label"].values
-        y_pred = st.session_state.model.predict(X_test)
-        y_prob = st.session_state.model.predict_proba(X_test)
+        X_test = extract_features_batch(test_df["url"])
+        parsed = ~failed_rows(X_test)
+        X_test = X_test[parsed]
+        y_true = test_df["label"].values[parsed]
+        scores = engine.score(X_test)
+        y_pred = scores.labels
         
         accuracy = accuracy_score(y_true, y_pred) * 100
         precision = precision_score(y_true, y_pred) * 100
@@ -950,8 +1113,8 @@ elif analysis_mode == "Model Performance":
             st.plotly_chart(fig, use_container_width=True)
         
         with col2:
-            if len(y_prob.shape) > 1:
-                fpr, tpr, thresholds = roc_curve(y_true, y_prob[:, 1])
+            if len(engine.classes_) > 1:
+                fpr, tpr, thresholds = roc_curve(y_true, scores.risk)
                 roc_auc = auc(fpr, tpr)
                 
                 fig = px.area(
@@ -966,10 +1129,10 @@ elif analysis_mode == "Model Performance":
                 st.plotly_chart(fig, use_container_width=True)
         
         st.subheader("🔍 Feature Importance")
-        if hasattr(st.session_state.model, 'feature_importances_'):
+        if hasattr(model, 'feature_importances_'):
             importance_df = pd.DataFrame({
                 'Feature': FEATURE_NAMES,
-                'Importance': st.session_state.model.feature_importances_
+                'Importance': model.feature_importances_
             }).sort_values('Importance', ascending=True)
             
             importance_df = importance_df.tail(15)
@@ -996,20 +1159,15 @@ elif analysis_mode == "Traffic Insights":
             "http://bank.com/transfer?to='; DROP TABLE users;--",
         ]
         
-        traffic_data = []
-        for url in sample_urls * 20: 
-            features = extract_features(url)
-            pred = st.session_state.model.predict([features])[0]
-            traffic_type = st.session_state.traffic_analyzer.classify_traffic(url)
-            
-            traffic_data.append({
-                'URL': url,
-                'Traffic_Type': traffic_type,
-                'Threat_Status': 'Malicious' if pred else 'Benign',
-                'Timestamp': pd.Timestamp.now() - pd.Timedelta(minutes=np.random.randint(0, 1440))
-            })
+        scored = score_urls(sample_urls * 20, engine,
+                            st.session_state.traffic_analyzer, extract=feature_cache.extract_many)
         
-        df_traffic = pd.DataFrame(traffic_data)
+        df_traffic = pd.DataFrame({
+            'URL': scored['URL'],
+            'Traffic_Type': scored['Traffic_Type'],
+            'Threat_Status': np.where(scored['Status'] == 'Malicious', 'Malicious', 'Benign'),
+            'Timestamp': pd.Timestamp.now() - pd.to_timedelta(np.random.randint(0, 1440, size=len(scored)), unit='m')
+        })
         
         col1, col2 = st.columns(2)
         
@@ -0,0 +1,381 @@
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+import platform
+import tracemalloc
+import warnings
+import numpy as np
+import pandas as pd
+import joblib
+from sklearn.model_selection import train_test_split
+from utils import feature_extraction as fe
+from utils.cascade import CascadePrefilter
+from utils.dummy_data import generate_urls
+from utils.forest_export import FlatForest
+from utils.explanations import shap_contributions
+import serve
+from utils.scoring import ScoringEngine, score_urls
+from utils.traffic_analyzer import TrafficAnalyzer
+warnings.filterwarnings('ignore')
+
+DEFAULT_SIZES = [10_000, 100_000, 1_000_000]
+
+def _timed(fn, repeats=3):
+    """Best wall-clock time of fn() over a few runs, with its last result"""
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+def _peak_memory(fn):
+    """Peak traced Python allocation while running fn()"""
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+def build_corpus(size, seed=42):
+    """`size` URLs from the dummy_data generators, reproducible for a given seed"""
+    random.seed(seed)
+    return [url for url, _ in generate_urls(size)][:size]
+
+def _extraction_variants(workers):
+    return {
+        'extract_features': lambda urls: [fe.extract_features(u) for u in urls],
+        'extract_features_batch': fe.extract_features_batch,
+        'extract_features_parallel': lambda urls: fe.extract_features_parallel(urls, workers=workers)
+    }
+
+def _feature_groups():
+    """
+    The stages of extract_features as standalone callables over prepared URL views
+    Each takes a (url, raw_query, query, path, full_url) tuple
+    """
+    def parsing(v):
+        url = fe.normalize_url(v[0])
+        fe.percent_decode(url.raw_path), fe.percent_decode(url.base)
+
+    def tokenization(v):
+        tokens = fe.SPLIT_RE.split(v[2].lower())
+        lengths = [len(t) for t in tokens if t]
+        sum(lengths), max(lengths) if lengths else 0
+
+    def regex_counts(v):
+        url, _, query, _, full_url = v
+        query_lower, full_lower = query.lower(), full_url.lower()
+        fe.SPECIAL_CHARS_RE.findall(full_url), fe.ENCODED_CHARS_RE.findall(url), fe.DIGIT_RE.findall(query)
+        for pattern, text in [(fe.SQL_COMMENT_RE, query), (fe.SQL_QUOTE_RE, query),
+                              (fe.SQL_EQUALS_RE, query_lower), (fe.SQL_UNION_RE, query_lower),
+                              (fe.SQL_OR_INJECTION_RE, query_lower), (fe.XSS_EVENT_HANDLER_RE, full_lower),
+                              (fe.XSS_JS_PROTOCOL_RE, full_lower), (fe.XSS_ENCODED_SCRIPT_RE, url),
+                              (fe.XSS_HTML_ENTITY_RE, full_url), (fe.TRAVERSAL_RE, full_url),
+                              (fe.FILE_INCLUSION_RE, full_lower), (fe.COMMAND_INJECTION_RE, query)]:
+            pattern.search(text)
+
+    def keyword_scans(v):
+        fe.SQL_MATCHER.count(v[2].lower()), fe.XSS_MATCHER.count(v[4].lower())
+
+    def entropy(v):
+        fe.entropy(v[2]), fe.entropy(v[3]), fe.entropy(v[4])
+
+    def parse_qs(v):
+        fe._param_stats(v[1])
+
+    return {
+        'parsing': parsing,
+        'tokenization': tokenization,
+        'regex_counts': regex_counts,
+        'keyword_scans': keyword_scans,
+        'entropy': entropy,
+        'parse_qs': parse_qs
+    }
+
+def feature_group_breakdown(urls, repeats=3):
+    """Seconds spent in each feature group of the scalar extractor over urls"""
+    views = []
+    for url in urls:
+        n = fe.normalize_url(url)
+        views.append((url, n.raw_query, n.query, fe.percent_decode(n.raw_path),
+                      fe.percent_decode(n.base) + n.rest_decoded))
+
+    seconds = {}
+    for name, group in _feature_groups().items():
+        seconds[name], _ = _timed(lambda: [group(v) for v in views], repeats)
+
+    total = sum(seconds.values())
+    return {
+        name: {
+            'seconds': t,
+            'us_per_url': t / len(urls) * 1e6,
+            'share': t / total if total else 0
+        }
+        for name, t in seconds.items()
+    }
+
+def benchmark_extraction(sizes=DEFAULT_SIZES, workers=None, repeats=1, memory_sample=100_000,
+                         breakdown_sample=20_000):
+    """
+    Throughput (URLs/s) and peak memory of each extraction variant per corpus size,
+    plus the per-feature-group cost breakdown of the scalar path
+    """
+    print("🔍 Benchmarking feature extraction...")
+    variants = _extraction_variants(workers)
+    results = {}
+
+    for size in sizes:
+        urls = build_corpus(size)
+        results[str(size)] = {}
+        for name, extract in variants.items():
+            # Cold prefix memo for every run so variants are compared fairly
+            def run():
+                fe._base_features.cache_clear()
+                return extract(urls)
+
+            seconds, _ = _timed(run, repeats)
+            sample = urls[:memory_sample]
+            fe._base_features.cache_clear()
+            peak = _peak_memory(lambda: extract(sample))
+            results[str(size)][name] = {
+                'seconds': seconds,
+                'urls_per_sec': size / seconds,
+                'peak_bytes': peak,
+                'peak_bytes_per_url': peak / len(sample)
+            }
+            print(f"   {size:>9,} URLs | {name:26s} | {size / seconds:>10,.0f} URLs/s | "
+                  f"{peak / len(sample):>8,.0f} B/URL peak")
+
+    breakdown = feature_group_breakdown(build_corpus(breakdown_sample))
+    print("   Feature group breakdown (scalar path):")
+    for name, group in sorted(breakdown.items(), key=lambda item: -item[1]['seconds']):
+        print(f"   {name:14s} {group['us_per_url']:8.2f} us/URL  {group['share']*100:5.1f}%")
+
+    return {'throughput': results, 'feature_groups': breakdown}
+
+def _recall(results, labels):
+    malicious = labels == 1
+    return float(np.mean(results['Status'].to_numpy()[malicious] == 'Malicious')) if malicious.any() else 0.0
+
+def benchmark_cascade(data_path="enhanced_training_data.csv", model_path="model/rf_model.pkl",
+                      fn_budget=0.0, benign_ratio=0.9, size=20000, repeats=3):
+    """
+    Throughput of full scoring vs the two-tier cascade on a held-out corpus
+    The prefilter is calibrated on the training split; the test split is resampled
+    to `benign_ratio` benign URLs to mimic production traffic
+    """
+    print("⚡ Benchmarking scoring cascade...")
+    df = pd.read_csv(data_path)
+    train_df, test_df = train_test_split(df, test_size=0.2, random_state=42, stratify=df["label"])
+
+    rng = np.random.default_rng(42)
+    benign = test_df[test_df["label"] == 0]
+    malicious = test_df[test_df["label"] == 1]
+    n_benign = int(size * benign_ratio)
+    corpus = pd.concat([
+        benign.iloc[rng.integers(0, len(benign), n_benign)],
+        malicious.iloc[rng.integers(0, len(malicious), size - n_benign)]
+    ]).sample(frac=1, random_state=42)
+    # Make every URL distinct so duplicate folding doesn't hide the per-URL cost
+    urls = [f"{url}{'&' if '?' in url else '?'}r={i}" if label == 0 else url
+            for i, (url, label) in enumerate(zip(corpus["url"], corpus["label"]))]
+    labels = corpus["label"].to_numpy()
+
+    engine = ScoringEngine(joblib.load(model_path))
+    analyzer = TrafficAnalyzer()
+    prefilter = CascadePrefilter.calibrate(train_df["url"], train_df["label"], fn_budget=fn_budget)
+
+    full_time, full_results = _timed(lambda: score_urls(urls, engine, analyzer), repeats)
+    cascade_time, cascade_results = _timed(lambda: score_urls(urls, engine, analyzer, prefilter=prefilter), repeats)
+
+    report = {
+        'urls': len(urls),
+        'benign_ratio': benign_ratio,
+        'prefilter': prefilter.to_dict(),
+        'prefilter_share': float(np.mean(cascade_results['Tier'] == 'Prefilter')),
+        'full_urls_per_sec': len(urls) / full_time,
+        'cascade_urls_per_sec': len(urls) / cascade_time,
+        'speedup': full_time / cascade_time,
+        'full_recall': _recall(full_results, labels),
+        'cascade_recall': _recall(cascade_results, labels)
+    }
+
+    print(f"   Prefilter decided {report['prefilter_share']*100:.1f}% of {len(urls):,} URLs")
+    print(f"   Full model: {report['full_urls_per_sec']:,.0f} URLs/s, recall {report['full_recall']:.4f}")
+    print(f"   Cascade:    {report['cascade_urls_per_sec']:,.0f} URLs/s, recall {report['cascade_recall']:.4f}")
+    print(f"   Speedup:    {report['speedup']:.2f}x")
+    return report
+
+def benchmark_inference(model_path="model/rf_model.pkl", batch_sizes=(1, 10, 100, 10_000), repeats=20):
+    """Latency per call of sklearn's predict_proba vs the flat forest evaluator"""
+    print("🌲 Benchmarking forest inference...")
+    model = joblib.load(model_path)
+    flat = FlatForest.from_model(model)
+    X = fe.extract_features_batch(build_corpus(max(batch_sizes)))
+    results = {}
+
+    for n in batch_sizes:
+        batch = X[:n]
+        sklearn_time, expected = _timed(lambda: model.predict_proba(batch), repeats)
+        flat_time, probas = _timed(lambda: flat.predict_proba(batch), repeats)
+        results[str(n)] = {
+            'sklearn_ms': sklearn_time * 1e3,
+            'flat_ms': flat_time * 1e3,
+            'speedup': sklearn_time / flat_time,
+            'identical': bool(np.array_equal(expected, probas))
+        }
+        print(f"   {n:>7,} rows | sklearn {sklearn_time*1e3:9.2f} ms | flat {flat_time*1e3:9.2f} ms | "
+              f"{sklearn_time / flat_time:6.2f}x | identical: {results[str(n)]['identical']}")
+
+    # Early exit on the largest batch, with the exact stopping rule and with confidence bounds
+    labels = model.predict(X)
+    sklearn_time, _ = _timed(lambda: model.predict_proba(X), 3)
+    results['early_exit'] = {}
+    for delta in (None, 0.05, 0.01):
+        seconds, staged = _timed(lambda: flat.predict_early_exit(X, delta=delta), 3)
+        results['early_exit'][str(delta)] = {
+            'ms': seconds * 1e3,
+            'speedup_vs_sklearn': sklearn_time / seconds,
+            'avg_trees_used': float(staged.trees_used.mean()),
+            'label_agreement': float(np.mean(staged.labels == labels))
+        }
+        print(f"   early exit (delta={delta}) | {seconds*1e3:9.2f} ms | "
+              f"{staged.trees_used.mean():6.1f}/{flat.n_estimators} trees | "
+              f"agreement {np.mean(staged.labels == labels):.4f}")
+    return results
+
+def _rank_agreement(exact, fast, k=5):
+    """Mean top-k overlap and mean Spearman correlation of |contribution| rankings per row"""
+    top_exact = np.argsort(-np.abs(exact), axis=1, kind='stable')[:, :k]
+    top_fast = np.argsort(-np.abs(fast), axis=1, kind='stable')[:, :k]
+    overlap = np.mean([len(set(a) & set(b)) / k for a, b in zip(top_exact, top_fast)])
+    ranks_exact = pd.DataFrame(np.abs(exact)).rank(axis=1).to_numpy()
+    ranks_fast = pd.DataFrame(np.abs(fast)).rank(axis=1).to_numpy()
+    spearman = np.nanmean([np.corrcoef(a, b)[0, 1] for a, b in zip(ranks_exact, ranks_fast)])
+    return float(overlap), float(spearman)
+
+def benchmark_explanations(model_path="model/rf_model.pkl", size=500, k=5):
+    """Speed of exact TreeSHAP vs decision-path (Saabas) contributions, and how well their rankings agree"""
+    print("🧠 Benchmarking explanations...")
+    import shap
+    model = joblib.load(model_path)
+    flat = FlatForest.from_model(model)
+    X = fe.extract_features_batch(build_corpus(size))
+
+    explainer = shap.Explainer(model)
+    exact_time, exact = _timed(lambda: shap_contributions(explainer, X), repeats=1)
+    fast_time, fast = _timed(lambda: flat.contributions(X), repeats=3)
+    overlap, spearman = _rank_agreement(exact, fast, k)
+
+    report = {
+        'rows': size,
+        'exact_seconds': exact_time,
+        'fast_seconds': fast_time,
+        'speedup': exact_time / fast_time,
+        f'top{k}_overlap': overlap,
+        'spearman': spearman
+    }
+    print(f"   Exact SHAP: {size / exact_time:,.0f} rows/s | Fast: {size / fast_time:,.0f} rows/s "
+          f"| {report['speedup']:.1f}x")
+    print(f"   Ranking agreement: top-{k} overlap {overlap:.3f}, Spearman {spearman:.3f}")
+    return report
+
+async def _service_load(urls, clients, port, **service_options):
+    """Requests/s of single-URL requests from concurrent keep-alive clients against a local service"""
+    server, batcher_task = await serve.start_service(port=port, scorer=serve.Scorer(), **service_options)
+    async def client(share):
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        for url in share:
+            await serve.request_json(reader, writer, "/score", {'url': url})
+        writer.close()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client(urls[i::clients]) for i in range(clients)))
+    seconds = time.perf_counter() - start
+    server.close()
+    await server.wait_closed()
+    batcher_task.cancel()
+    return len(urls) / seconds
+
+def benchmark_service(requests=2000, clients=64, port=8799):
+    """Throughput of the HTTP scoring service with micro-batching vs one model call per request"""
+    print("🛰️ Benchmarking scoring service...")
+    urls = build_corpus(requests)
+    unbatched = asyncio.run(_service_load(urls, clients, port, window=0, max_urls=1))
+    batched = asyncio.run(_service_load(urls, clients, port))
+    report = {
+        'requests': requests,
+        'clients': clients,
+        'unbatched_rps': unbatched,
+        'batched_rps': batched,
+        'speedup': batched / unbatched
+    }
+    print(f"   One call per URL: {unbatched:,.0f} req/s | Micro-batched: {batched:,.0f} req/s "
+          f"| {report['speedup']:.1f}x")
+    return report
+
+def benchmark_traffic(sizes=DEFAULT_SIZES, scalar_sample=100_000):
+    """
+    Traffic analysis throughput: classify_traffic per URL vs classify_many over the
+    column, and columnar anomaly scoring
+    """
+    print("🚦 Benchmarking traffic analysis...")
+    analyzer = TrafficAnalyzer()
+    results = {}
+    for size in sizes:
+        urls = build_corpus(size)
+        sample = urls[:scalar_sample]
+        scalar_seconds, _ = _timed(lambda: [analyzer.classify_traffic(u) for u in sample], repeats=1)
+        many_seconds, _ = _timed(lambda: analyzer.classify_many(urls), repeats=1)
+        anomaly_seconds, _ = _timed(lambda: analyzer.score_anomalies(urls), repeats=1)
+        results[str(size)] = {
+            'classify_traffic_urls_per_sec': len(sample) / scalar_seconds,
+            'classify_many_urls_per_sec': size / many_seconds,
+            'score_anomalies_urls_per_sec': size / anomaly_seconds
+        }
+        print(f"   {size:>9,} URLs | classify_traffic {len(sample) / scalar_seconds:>10,.0f} URLs/s | "
+              f"classify_many {size / many_seconds:>10,.0f} URLs/s | "
+              f"score_anomalies {size / anomaly_seconds:>10,.0f} URLs/s")
+    return results
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="XAI Cyber Monitor performance benchmarks")
+    parser.add_argument("--suite", nargs="+", default=["extraction", "cascade", "inference"],
+                        choices=["extraction", "cascade", "inference", "explanations", "service", "traffic"])
+    parser.add_argument("--sizes", nargs="+", type=int, default=DEFAULT_SIZES)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--output", default="benchmark_results.json")
+    args = parser.parse_args(argv)
+
+    report = {
+        'timestamp': time.strftime("%Y-%m-%dT%H:%M:%S"),
+        'python': sys.version.split()[0],
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count()
+    }
+    if "extraction" in args.suite:
+        report['extraction'] = benchmark_extraction(sizes=args.sizes, workers=args.workers)
+    if "cascade" in args.suite:
+        report['cascade'] = benchmark_cascade()
+    if "inference" in args.suite:
+        report['inference'] = benchmark_inference()
+    if "explanations" in args.suite:
+        report['explanations'] = benchmark_explanations()
+    if "service" in args.suite:
+        report['service'] = benchmark_service()
+    if "traffic" in args.suite:
+        report['traffic'] = benchmark_traffic(sizes=args.sizes)
+
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"💾 Results saved to: {args.output}")
+    return report
+
+if __name__ == "__main__":
+    main()
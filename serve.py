@@ -0,0 +1,242 @@
+import json
+import asyncio
+import argparse
+import warnings
+from utils.feature_extraction import N_FEATURES
+from utils.feature_cache import FeatureCache
+from utils.model_registry import ModelRegistry
+from utils.scoring import score_urls
+from utils.traffic_analyzer import TrafficAnalyzer
+warnings.filterwarnings('ignore')
+
+MODEL_PATH = "model/rf_model.pkl"
+FLAT_MODEL_PATH = "model/rf_flat.pkl"
+
+# Requests arriving within this window of the first queued one are scored together
+BATCH_WINDOW_MS = 5
+MAX_BATCH_URLS = 2048
+MAX_BODY_BYTES = 10 * 1024 * 1024
+FEATURE_CACHE_MAX_MB = 64
+
+HTTP_REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+                413: 'Payload Too Large', 500: 'Internal Server Error'}
+
+class Scorer:
+    """
+    The app's scoring pipeline (feature cache, forest, traffic analyzer) as a plain callable
+    New model files are hot-swapped by a ModelRegistry; each batch is scored by one version
+    """
+
+    def __init__(self, model_path=MODEL_PATH, flat_model_path=FLAT_MODEL_PATH, cache_mb=FEATURE_CACHE_MAX_MB):
+        self.registry = ModelRegistry(model_path, flat_model_path, feature_names=[str(i) for i in range(N_FEATURES)])
+        self.traffic_analyzer = TrafficAnalyzer()
+        self.feature_cache = FeatureCache(max_bytes=cache_mb * 1024 * 1024)
+
+    @property
+    def model_version(self):
+        return self.registry.current().version
+
+    def __call__(self, urls):
+        engine = self.registry.current().engine
+        scored = score_urls(urls, engine, self.traffic_analyzer, extract=self.feature_cache.extract_many)
+        return [
+            {
+                'url': url,
+                'label': status,
+                'risk': float(risk),
+                'traffic_type': traffic_type,
+                'model_version': version
+            }
+            for url, status, risk, traffic_type, version in zip(
+                scored['URL'], scored['Status'], scored['Risk_Score'], scored['Traffic_Type'], scored['Model_Version'])
+        ]
+
+class MicroBatcher:
+    """
+    Coalesces concurrent scoring requests into batches
+    Requests wait on an asyncio queue; the worker takes everything that arrives
+    within `window` seconds of the first one (up to max_urls URLs) and scores it
+    with a single call in a worker thread, then hands each request its rows
+    """
+
+    def __init__(self, score, window=BATCH_WINDOW_MS / 1000, max_urls=MAX_BATCH_URLS):
+        self.score = score
+        self.window = window
+        self.max_urls = max_urls
+        self.queue = asyncio.Queue()
+        self.batches = 0
+        self.requests = 0
+
+    async def submit(self, urls):
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((urls, future))
+        return await future
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            pending = [await self.queue.get()]
+            size = len(pending[0][0])
+            deadline = loop.time() + self.window
+            while size < self.max_urls:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    pending.append(await asyncio.wait_for(self.queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+                size += len(pending[-1][0])
+
+            urls = [url for request_urls, _ in pending for url in request_urls]
+            try:
+                results = await loop.run_in_executor(None, self.score, urls)
+            except Exception as e:
+                for _, future in pending:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            self.batches += 1
+            self.requests += len(pending)
+            start = 0
+            for request_urls, future in pending:
+                if not future.done():
+                    future.set_result(results[start:start + len(request_urls)])
+                start += len(request_urls)
+
+class ScoringService:
+    """
+    Minimal HTTP/1.1 JSON API over a MicroBatcher
+    POST /score with {"url": ...} or {"urls": [...]}, GET /health
+    """
+
+    def __init__(self, batcher, scorer):
+        self.batcher = batcher
+        self.scorer = scorer
+
+    async def handle(self, path, method, body):
+        if path == '/health':
+            return 200, {
+                'status': 'ok',
+                'model_version': getattr(self.scorer, 'model_version', None),
+                'batches': self.batcher.batches,
+                'requests': self.batcher.requests
+            }
+        if path != '/score':
+            return 404, {'error': f"Unknown path {path}"}
+        if method != 'POST':
+            return 405, {'error': "Use POST"}
+        try:
+            payload = json.loads(body)
+        except ValueError:
+            return 400, {'error': "Body must be JSON"}
+
+        if isinstance(payload, dict) and isinstance(payload.get('url'), str):
+            return 200, (await self.batcher.submit([payload['url']]))[0]
+        if isinstance(payload, dict) and isinstance(payload.get('urls'), list) \
+                and all(isinstance(url, str) for url in payload['urls']):
+            return 200, {'results': await self.batcher.submit(payload['urls'])}
+        return 400, {'error': "Expected {\"url\": str} or {\"urls\": [str, ...]}"}
+
+    async def handle_connection(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+
+                parts = request_line.decode('latin-1').split()
+                try:
+                    length = int(headers.get('content-length', 0))
+                except ValueError:
+                    length = -1
+                # The body of a malformed request can't be located, so the connection is closed after replying
+                if len(parts) != 3:
+                    status, response = 400, {'error': "Malformed request line"}
+                    keep_alive = False
+                elif length < 0:
+                    status, response = 400, {'error': "Content-Length must be a non-negative integer"}
+                    keep_alive = False
+                elif length > MAX_BODY_BYTES:
+                    status, response = 413, {'error': "Request body too large"}
+                    keep_alive = False
+                else:
+                    method, path, _ = parts
+                    body = await reader.readexactly(length) if length else b''
+                    try:
+                        status, response = await self.handle(path.split('?', 1)[0], method, body)
+                    except Exception as e:
+                        status, response = 500, {'error': str(e)}
+                    keep_alive = headers.get('connection', '').lower() != 'close'
+
+                data = json.dumps(response).encode('utf-8')
+                writer.write(
+                    f"HTTP/1.1 {status} {HTTP_REASONS[status]}\r\n"
+                    f"Content-Type: application/json\r\n"
+                    f"Content-Length: {len(data)}\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode('latin-1') + data
+                )
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ValueError, asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+async def start_service(host="127.0.0.1", port=8765, scorer=None, window=BATCH_WINDOW_MS / 1000,
+                        max_urls=MAX_BATCH_URLS):
+    """Start the batcher and HTTP server; returns (server, batcher_task)"""
+    scorer = scorer or Scorer()
+    batcher = MicroBatcher(scorer, window=window, max_urls=max_urls)
+    service = ScoringService(batcher, scorer)
+    batcher_task = asyncio.create_task(batcher.run())
+    server = await asyncio.start_server(service.handle_connection, host, port)
+    return server, batcher_task
+
+async def request_json(reader, writer, path, payload=None, host="127.0.0.1"):
+    """Send one request over an open keep-alive connection and return (status, JSON body)"""
+    body = json.dumps(payload).encode('utf-8') if payload is not None else b''
+    method = 'POST' if payload is not None else 'GET'
+    writer.write(
+        f"{method} {path} HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\n"
+        f"Content-Length: {len(body)}\r\n\r\n".encode('latin-1') + body
+    )
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b'\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        if name.strip().lower() == 'content-length':
+            length = int(value)
+    return status, json.loads(await reader.readexactly(length))
+
+async def _serve_forever(host, port, window):
+    scorer = Scorer()
+    scorer.registry.start()
+    server, _ = await start_service(host, port, scorer=scorer, window=window)
+    print(f"🛰️ Scoring service listening on http://{host}:{port} (batching window {window * 1000:.0f} ms)")
+    async with server:
+        await server.serve_forever()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="XAI Cyber Monitor scoring service")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--window-ms", type=float, default=BATCH_WINDOW_MS)
+    args = parser.parse_args(argv)
+    asyncio.run(_serve_forever(args.host, args.port, args.window_ms / 1000))
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,113 @@
-import pandas as pd
 import numpy as np
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.model_selection import train_test_split, cross_val_score, GridSearchCV
 from sklearn.metrics import classification_report, confusion_matrix, accuracy_score
 import joblib
 import os
-from utils.feature_extraction import extract_features
+import copy
+import json
+import time
+import argparse
+from utils.feature_extraction import extract_features_parallel, failed_rows
 from utils.dummy_data import generate_large_dataset
+from utils.url_stream import iter_feature_blocks
+from utils.cascade import CascadePrefilter
+from utils.forest_export import FlatForest, model_fingerprint
+from utils.scoring import ScoringEngine
 
-def train_enhanced_model():
+# Candidate sizes for the compact serving model
+COMPACT_TREE_COUNTS = [10, 25, 50, 100, 200]
+COMPACT_MAX_DEPTHS = [6, 10, 14]
+
+def _first_trees(model, n_trees):
+    """Copy of a fitted forest that keeps only its first n_trees trees"""
+    compact = copy.copy(model)
+    compact.estimators_ = model.estimators_[:n_trees]
+    compact.n_estimators = n_trees
+    return compact
+
+def _serving_cost(model, X, samples=200):
+    """p95 single-URL latency (ms) and batch throughput (rows/s) through the app's scoring path"""
+    flat_forest = FlatForest.from_model(model)
+    engine = ScoringEngine(model, fast_model=flat_forest)
+    latencies = []
+    for row in X[:samples]:
+        start = time.perf_counter()
+        engine.score(row[None])
+        latencies.append(time.perf_counter() - start)
+    start = time.perf_counter()
+    engine.score(X)
+    return np.percentile(latencies, 95) * 1e3, len(X) / (time.perf_counter() - start), flat_forest.node_count
+
+def export_compact_model(best_model, params, X_train, y_train, X_test, y_test,
+                         latency_budget_ms=None, max_nodes=None,
+                         model_path="model/rf_compact.pkl", metadata_path="model/compact_metadata.json"):
+    """
+    Pick the most accurate forest that fits a serving budget
+    Candidates cap the depth (refitting with the tuned parameters) and keep only the
+    first trees of each forest; the one meeting the p95 single-URL latency and node
+    count budgets with the best test accuracy is saved with its trade-off report
+    """
+    print("📦 Building compact serving model...")
+    best_depth = params.get('max_depth')
+    depths = [d for d in COMPACT_MAX_DEPTHS if best_depth is None or d < best_depth] + [best_depth]
+    tree_counts = [n for n in COMPACT_TREE_COUNTS if n < best_model.n_estimators] + [best_model.n_estimators]
+    
+    candidates = []
+    for depth in depths:
+        if depth == best_depth:
+            forest = best_model
+        else:
+            forest = RandomForestClassifier(**{**params, 'max_depth': depth}, random_state=42)
+            forest.fit(X_train, y_train)
+        for n_trees in tree_counts:
+            model = _first_trees(forest, n_trees)
+            latency_ms, rows_per_sec, nodes = _serving_cost(model, X_test)
+            candidates.append({
+                'n_estimators': n_trees,
+                'max_depth': depth,
+                'nodes': nodes,
+                'accuracy': accuracy_score(y_test, model.predict(X_test)),
+                'p95_latency_ms': latency_ms,
+                'rows_per_sec': rows_per_sec,
+                'model': model
+            })
+            print(f"   {n_trees:4d} trees, depth {str(depth):>4s}: accuracy {candidates[-1]['accuracy']:.4f}, "
+                  f"p95 {latency_ms:.2f} ms, {rows_per_sec:,.0f} rows/s, {nodes:,} nodes")
+    
+    full = candidates[-1]
+    fits = [c for c in candidates
+            if (latency_budget_ms is None or c['p95_latency_ms'] <= latency_budget_ms)
+            and (max_nodes is None or c['nodes'] <= max_nodes)]
+    if fits:
+        chosen = max(fits, key=lambda c: (c['accuracy'], -c['p95_latency_ms']))
+    else:
+        chosen = min(candidates, key=lambda c: c['p95_latency_ms'])
+        print("⚠️ No candidate fits the budget, keeping the fastest one")
+    
+    joblib.dump(chosen['model'], model_path)
+    report = {
+        'latency_budget_ms': latency_budget_ms,
+        'max_nodes': max_nodes,
+        'within_budget': bool(fits),
+        'chosen': {k: v for k, v in chosen.items() if k != 'model'},
+        'full': {k: v for k, v in full.items() if k != 'model'},
+        'accuracy_loss': full['accuracy'] - chosen['accuracy'],
+        'latency_speedup': full['p95_latency_ms'] / chosen['p95_latency_ms'],
+        'throughput_gain': chosen['rows_per_sec'] / full['rows_per_sec'],
+        'candidates': [{k: v for k, v in c.items() if k != 'model'} for c in candidates]
+    }
+    with open(metadata_path, "w") as f:
+        json.dump(report, f, indent=2)
+    
+    print(f"🎯 Compact model: {chosen['n_estimators']} trees, depth {chosen['max_depth']}, "
+          f"accuracy {chosen['accuracy']:.4f} ({report['accuracy_loss']*100:+.2f} pts lost), "
+          f"{report['latency_speedup']:.1f}x lower p95 latency, {report['throughput_gain']:.1f}x throughput")
+    print(f"💾 Compact model saved to: {model_path} (report: {metadata_path})")
+    return chosen['model']
+
+def train_enhanced_model(workers=None, data_path="enhanced_training_data.csv", block_size=50000,
+                         prefilter_fn_budget=0.0, compact_latency_ms=None, compact_max_nodes=None):
     """Train enhanced model with better performance and larger dataset"""
     
     print("🚀 Starting Enhanced Model Training...")
@@ -18,30 +117,36 @@ def train_enhanced_model():
     
     # Generated larger dataset for better training
     print("📊 Generating enhanced training dataset...")
-    generate_large_dataset()
+    generate_large_dataset(filename=data_path)
     
-    # Loaded training data
-    df = pd.read_csv("enhanced_training_data.csv")
-    print(f"✅ Loaded {len(df)} training samples")
-    
-    # Extracted features
+    # Streamed training data through feature extraction block by block
     print("🔍 Extracting features...")
-    X = []
-    for i, url in enumerate(df["url"]):
-        if i % 1000 == 0:
-            print(f"Processing {i}/{len(df)} URLs...")
-        features = extract_features(url)
-        X.append(features)
+    X_blocks, y_blocks, url_blocks = [], [], []
+    blocks = iter_feature_blocks(
+        data_path, block_size=block_size,
+        extract=lambda urls: extract_features_parallel(urls, workers=workers)
+    )
+    for frame, features in blocks:
+        # URLs that can't be parsed have no feature vector to learn from
+        parsed = ~failed_rows(features)
+        if not parsed.all():
+            print(f"⚠️ Skipping {(~parsed).sum()} unparseable URLs")
+        X_blocks.append(features[parsed])
+        y_blocks.append(frame["label"].to_numpy()[parsed])
+        url_blocks.append(frame["url"].to_numpy()[parsed])
+        print(f"Processing {sum(len(b) for b in y_blocks)} URLs...")
     
-    X = np.array(X)
-    y = df["label"].values
+    X = np.concatenate(X_blocks)
+    y = np.concatenate(y_blocks)
+    urls = np.concatenate(url_blocks)
+    print(f"✅ Loaded {len(X)} training samples")
     
     print(f"📏 Feature matrix shape: {X.shape}")
     print(f"🎯 Target distribution: {np.bincount(y)}")
     
     # Split data
-    X_train, X_test, y_train, y_test = train_test_split(
-        X, y, test_size=0.2, random_state=42, stratify=y
+    X_train, X_test, y_train, y_test, urls_train, urls_test = train_test_split(
+        X, y, urls, test_size=0.2, random_state=42, stratify=y
     )
     
     # Hyperparameter tuning
@@ -100,11 +205,25 @@ def train_enhanced_model():
     for i, (feature, importance) in enumerate(importance_pairs[:10], 1):
         print(f"{i:2d}. {feature:20s}: {importance:.4f}")
     
+    # Calibrate the cascade prefilter on the training split. It is written before the
+    # model so a running app's registry loads the two together
+    prefilter = CascadePrefilter.calibrate(urls_train, y_train, fn_budget=prefilter_fn_budget)
+    prefilter.save("model/prefilter.json")
+    test_fn_rate = np.mean(prefilter.clears(urls_test[y_test == 1])) if (y_test == 1).any() else 0.0
+    print(f"⚡ Prefilter threshold {prefilter.threshold}: clears {prefilter.clear_rate*100:.1f}% of training URLs, "
+          f"false negatives {prefilter.fn_rate*100:.2f}% (train) / {test_fn_rate*100:.2f}% (test)")
+    
     # Save model
     model_path = "model/rf_model.pkl"
     joblib.dump(best_model, model_path)
     print(f"💾 Model saved to: {model_path}")
     
+    # Export the flat node arrays the app memory-maps for low-latency scoring
+    flat_forest = FlatForest.from_model(best_model)
+    flat_forest.source = model_fingerprint(model_path)
+    flat_forest.save("model/rf_flat.pkl")
+    print(f"💾 Flat forest ({flat_forest.node_count:,} nodes) saved to: model/rf_flat.pkl")
+    
     # Save training metadata
     metadata = {
         'accuracy': accuracy,
@@ -116,12 +235,26 @@ def train_enhanced_model():
         'test_samples': len(X_test)
     }
     
-    import json
     with open("model/training_metadata.json", "w") as f:
         json.dump(metadata, f, indent=2)
     
+    # Optional compact serving model under a latency / size budget
+    if compact_latency_ms is not None or compact_max_nodes is not None:
+        export_compact_model(
+            best_model, grid_search.best_params_, X_train, y_train, X_test, y_test,
+            latency_budget_ms=compact_latency_ms, max_nodes=compact_max_nodes
+        )
+    
     print("✅ Enhanced model training completed!")
     return best_model
 
 if __name__ == "__main__":
-    train_enhanced_model()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Train the URL threat detection model")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--compact-latency-ms", type=float, default=None,
+                        help="Also export a compact model whose p95 single-URL latency fits this budget")
+    parser.add_argument("--compact-max-nodes", type=int, default=None,
+                        help="Also export a compact model with at most this many tree nodes")
+    args = parser.parse_args()
+    train_enhanced_model(workers=args.workers, compact_latency_ms=args.compact_latency_ms,
+                         compact_max_nodes=args.compact_max_nodes)
\ No newline at end of file
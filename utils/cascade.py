@@ -0,0 +1,70 @@
+# utils/cascade.py
+import re
+import json
+import numpy as np
+import pandas as pd
+
+# Characters and sequences that plain benign URLs do not need:
+# markup, quotes, shell metacharacters, whitespace, percent-encoding, '..' and '--'
+PREFILTER_RE = re.compile(r'[<>"\'`;(){}\[\]\\%$|!*\s]|\.\.|--')
+
+def cheap_scores(urls):
+    """Count of risky characters in each raw URL, the only work done by stage one"""
+    urls = pd.Series(list(urls), dtype=object)
+    return urls.str.count(PREFILTER_RE).fillna(np.inf).to_numpy(dtype=np.float64)
+
+class CascadePrefilter:
+    """
+    Stage one of the two-tier scoring cascade
+    A URL is cleared as benign without feature extraction or the forest when its
+    cheap score is below the threshold; the threshold is calibrated on labelled
+    training URLs so that at most fn_budget of the malicious ones are cleared
+    """
+
+    def __init__(self, threshold=1, fn_budget=0.0, fn_rate=0.0, clear_rate=0.0):
+        self.threshold = threshold
+        self.fn_budget = fn_budget
+        self.fn_rate = fn_rate
+        self.clear_rate = clear_rate
+
+    @classmethod
+    def calibrate(cls, urls, labels, fn_budget=0.0):
+        """Pick the largest threshold whose false-negative rate on (urls, labels) fits the budget"""
+        scores = cheap_scores(urls)
+        labels = np.asarray(labels)
+        malicious = scores[labels == 1]
+
+        threshold = 0
+        for candidate in np.unique(scores[np.isfinite(scores)]) + 1:
+            fn_rate = np.mean(malicious < candidate) if len(malicious) else 0.0
+            if fn_rate > fn_budget:
+                break
+            threshold = int(candidate)
+
+        return cls(
+            threshold=threshold,
+            fn_budget=fn_budget,
+            fn_rate=float(np.mean(malicious < threshold)) if len(malicious) else 0.0,
+            clear_rate=float(np.mean(scores < threshold)) if len(scores) else 0.0
+        )
+
+    def clears(self, urls):
+        """Boolean mask of URLs stage one decides as benign"""
+        return cheap_scores(urls) < self.threshold
+
+    def to_dict(self):
+        return {
+            'threshold': self.threshold,
+            'fn_budget': self.fn_budget,
+            'fn_rate': self.fn_rate,
+            'clear_rate': self.clear_rate
+        }
+
+    def save(self, path):
+        with open(path, "w") as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+    @classmethod
+    def load(cls, path):
+        with open(path) as f:
+            return cls(**json.load(f))
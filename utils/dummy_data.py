@@ -4,8 +4,8 @@ import csv
 import random
 import urllib.parse
 
-def generate_large_dataset(filename="enhanced_training_data.csv", size=5000):
-    """Generate a large, diverse dataset for training"""
+def generate_urls(size=5000):
+    """Generate a large, diverse, shuffled list of (url, label) pairs"""
     
     # Benign URL patterns
     benign_domains = [
@@ -139,6 +139,12 @@ def generate_large_dataset(filename="enhanced_training_data.csv", size=5000):
     
     # Shuffle the dataset
     random.shuffle(all_urls)
+    return all_urls
+
+def generate_large_dataset(filename="enhanced_training_data.csv", size=5000):
+    """Generate a large, diverse dataset for training"""
+    
+    all_urls = generate_urls(size)
     
     # Write to CSV
     with open(filename, 'w', newline='', encoding='utf-8') as f:
@@ -0,0 +1,91 @@
+# utils/explanations.py
+import hashlib
+import threading
+from collections import OrderedDict, namedtuple
+import numpy as np
+
+# Top-k feature contributions of one row, largest absolute value first
+Contributions = namedtuple('Contributions', ['features', 'values'])
+
+def shap_contributions(explainer, X):
+    """Malicious-class SHAP values of every row of X from a single explainer call"""
+    values = explainer(np.asarray(X)).values
+    return values[..., 1] if values.ndim == 3 else values
+
+def format_contributions(contributions, k=3):
+    """Compact 'Feature (+0.123), ...' summary of the k largest contributions"""
+    return ', '.join(f"{name} ({value:+.3f})" for name, value in zip(contributions.features[:k], contributions.values[:k]))
+
+def vector_digest(vector):
+    """Cache key of a feature vector: digest of its float32 bytes"""
+    return hashlib.blake2b(np.ascontiguousarray(vector, dtype=np.float32).tobytes(), digest_size=16).digest()
+
+class ExplanationService:
+    """
+    Batched per-feature explanations with an LRU cache keyed by feature-vector hash
+    `contributions` maps an (N, F) feature matrix to its (N, F) contribution matrix;
+    all uncached distinct rows of a batch go through it in one call and only
+    their top_k contributions are kept
+    """
+
+    def __init__(self, contributions, feature_names, top_k=15, max_entries=50000):
+        self.contributions = contributions
+        self.feature_names = np.asarray(feature_names, dtype=object)
+        self.top_k = top_k
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _top(self, values):
+        order = np.argsort(-np.abs(values), kind='stable')[:self.top_k]
+        return Contributions(features=list(self.feature_names[order]), values=values[order])
+
+    def explain(self, features):
+        """Contributions of every row of a feature matrix, in row order"""
+        features = np.asarray(features, dtype=np.float32)
+        keys = [vector_digest(row) for row in features]
+        explanations = [None] * len(keys)
+        missing = {}
+        with self._lock:
+            for i, key in enumerate(keys):
+                cached = self._entries.get(key)
+                if cached is None:
+                    missing.setdefault(key, []).append(i)
+                else:
+                    self._entries.move_to_end(key)
+                    explanations[i] = cached
+            self.hits += len(keys) - sum(len(rows) for rows in missing.values())
+            self.misses += len(missing)
+
+        if missing:
+            rows = list(missing.values())
+            values = self.contributions(features[[r[0] for r in rows]])
+            with self._lock:
+                for key, r, row_values in zip(missing, rows, values):
+                    top = self._top(np.asarray(row_values))
+                    for i in r:
+                        explanations[i] = top
+                    self._entries[key] = top
+                    self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return explanations
+
+    def stats(self):
+        """Hit/miss counters and current size"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0,
+                'entries': len(self._entries)
+            }
+
+    def clear(self):
+        """Drop all entries and reset the counters"""
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = 0
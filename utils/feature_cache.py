@@ -0,0 +1,99 @@
+# utils/feature_cache.py
+import hashlib
+import threading
+from collections import OrderedDict
+import numpy as np
+from utils.feature_extraction import N_FEATURES, extract_features_batch, failed_rows
+
+# Rough per-entry bookkeeping cost (dict slot, bytes objects) on top of the payload
+ENTRY_OVERHEAD_BYTES = 160
+
+def url_digest(url):
+    """Fixed-size cache key for a URL"""
+    return hashlib.blake2b(url.encode('utf-8', 'surrogatepass'), digest_size=16).digest()
+
+class FeatureCache:
+    """
+    Process-wide LRU cache of feature vectors keyed by URL digest
+    Vectors are stored as packed float32 bytes and evicted least-recently-used
+    once the configured memory cap is reached
+    """
+
+    def __init__(self, max_bytes=64 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.entry_bytes = 16 + N_FEATURES * 4 + ENTRY_OVERHEAD_BYTES
+        self.max_entries = max(1, max_bytes // self.entry_bytes)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, url):
+        """Cached vector for url, or None"""
+        key = url_digest(url)
+        with self._lock:
+            packed = self._entries.get(key)
+            if packed is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        return np.frombuffer(packed, dtype=np.float32)
+
+    def put(self, url, features):
+        """Store a feature vector for url, evicting the oldest entries over the cap"""
+        packed = np.asarray(features, dtype=np.float32).tobytes()
+        key = url_digest(url)
+        with self._lock:
+            self._entries[key] = packed
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def extract_many(self, urls, extract=extract_features_batch):
+        """
+        Batch extraction through the cache, computing each missing URL once
+        `extract` maps a list of missing URLs to their feature matrix; rows it
+        fails on stay NaN and are not cached
+        """
+        urls = list(urls)
+        features = np.zeros((len(urls), N_FEATURES), dtype=np.float32)
+        missing = {}
+        for i, url in enumerate(urls):
+            cached = self.get(url) if isinstance(url, str) else None
+            if cached is None:
+                missing.setdefault(url if isinstance(url, str) else i, []).append(i)
+            else:
+                features[i] = cached
+
+        if missing:
+            rows = list(missing.values())
+            computed = extract([urls[r[0]] for r in rows])
+            failed = failed_rows(computed)
+            for r, vector, failure in zip(rows, computed, failed):
+                features[r] = vector
+                if isinstance(urls[r[0]], str) and not failure:
+                    self.put(urls[r[0]], vector)
+        return features
+
+    def stats(self):
+        """Hit/miss/eviction counters and current size"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': self.hits / lookups if lookups else 0,
+                'entries': len(self._entries),
+                'bytes': len(self._entries) * self.entry_bytes,
+                'max_bytes': self.max_bytes
+            }
+
+    def clear(self):
+        """Drop all entries and reset the counters"""
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.evictions = 0
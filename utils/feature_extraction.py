@@ -1,104 +1,266 @@
 # utils/feature_extraction.py
+import os
 import re
 import math
+import multiprocessing
 from urllib.parse import urlparse, parse_qs, unquote
-from collections import Counter
+from collections import Counter, namedtuple
+from functools import lru_cache
+from concurrent.futures import ProcessPoolExecutor, as_completed
 import numpy as np
+import pandas as pd
+from utils.keyword_matcher import KeywordMatcher
 
-def entropy(s):
-    """Calculate Shannon entropy of a string"""
-    if len(s) == 0:
+# Length of the vector returned by extract_features
+N_FEATURES = 32
+
+# Smallest chunk extract_features_parallel hands to a worker; smaller inputs run in-process
+PARALLEL_MIN_CHUNK = 256
+
+# Start method for extraction workers: forking a multi-threaded parent (a web server)
+# can leave a worker blocked on a lock another thread held
+POOL_START_METHOD = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+
+# Keyword signatures (substring matches on the lowercased text)
+SQL_KEYWORDS = ['select', 'union', 'insert', 'update', 'delete', 'drop', 'create', 'alter']
+SQL_OPERATORS = ['or', 'and', 'not', 'like', 'in', 'exists']
+SQL_FUNCTIONS = ['concat', 'substring', 'ascii', 'char', 'exec']
+XSS_KEYWORDS = ['script', 'alert', 'prompt', 'confirm', 'eval', 'onclick', 'onload', 'onerror']
+XSS_TAGS = ['<script>', '<iframe>', '<object>', '<embed>', '<form>', '<img>', '<svg>']
+
+# Prebuilt automata filling every keyword count in one pass over the text
+SQL_MATCHER = KeywordMatcher([SQL_KEYWORDS, SQL_OPERATORS, SQL_FUNCTIONS])
+XSS_MATCHER = KeywordMatcher([XSS_KEYWORDS, XSS_TAGS])
+
+# Precompiled patterns shared by the scalar and batch extractors
+WORD_RE = re.compile(r'\w')
+TOKEN_RE = re.compile(r'\w+')
+SPLIT_RE = re.compile(r'\W+')
+SPECIAL_CHARS_RE = re.compile(r'[<>"\';(){}[\]\\]')
+ENCODED_CHARS_RE = re.compile(r'%[0-9A-Fa-f]{2}')
+DIGIT_RE = re.compile(r'\d')
+SQL_COMMENT_RE = re.compile(r'(?:--|#|/\*)')
+SQL_QUOTE_RE = re.compile(r"'.*'|\".*\"")
+SQL_EQUALS_RE = re.compile(r"\b(?:or|and)\b.*=")
+SQL_UNION_RE = re.compile(r'union.*select')
+SQL_OR_INJECTION_RE = re.compile(r"'.*or.*'")
+XSS_EVENT_HANDLER_RE = re.compile(r'on\w+\s*=')
+XSS_JS_PROTOCOL_RE = re.compile(r'javascript:')
+XSS_ENCODED_SCRIPT_RE = re.compile(r'%3[Cc]script')
+XSS_HTML_ENTITY_RE = re.compile(r'&[a-zA-Z]+;')
+TRAVERSAL_RE = re.compile(r'\.\./')
+FILE_INCLUSION_RE = re.compile(r'(?:file://|ftp://|data:)')
+COMMAND_INJECTION_RE = re.compile(r'[;&|`$()]')
+SUSPICIOUS_PARAM_CHARS = '<>"\';()'
+
+# Bounded memo of the features that only depend on the scheme/host/path prefix
+PATH_CACHE_SIZE = 8192
+
+# The scheme/host/path prefix of a raw URL: everything before the query or fragment
+BASE_RE = re.compile(r'[^?#]*')
+
+# Percent-decoding passes applied by normalize_url; 1 is a plain unquote,
+# more peel nested encodings such as %252f -> %2f -> /
+# The shipped model/rf_model.pkl was trained on single-pass decoding, so raise this
+# (and enable DECODE_OVERLONG) only together with a retrained model
+DECODE_DEPTH = 1
+
+# Fold overlong UTF-8 sequences such as %c0%af in percent_decode (off for the shipped model)
+DECODE_OVERLONG = False
+
+# Overlong two-byte UTF-8 encodings of ASCII characters, e.g. %c0%af for '/'
+OVERLONG_RE = re.compile(r'%[cC]([01])%([89abAB][0-9a-fA-F])')
+
+def _counts_entropy(p, length):
+    """Shannon entropy from a Counter of characters and the string length"""
+    if length == 0:
         return 0
-    p = Counter(s)
-    lns = float(len(s))
+    lns = float(length)
     return -sum(count / lns * math.log2(count / lns) for count in p.values() if count)
 
+def entropy(s):
+    """Calculate Shannon entropy of a string"""
+    return _counts_entropy(Counter(s), len(s))
+
+def _overlong_char(match):
+    return chr((int(match.group(1), 16) << 6) | (int(match.group(2), 16) & 0x3F))
+
+def _overlong_escape(match):
+    return '%%%02X' % ord(_overlong_char(match))
+
+def percent_decode(s, depth=DECODE_DEPTH, overlong=DECODE_OVERLONG):
+    """
+    Percent-decode s until it stops changing, for at most `depth` passes
+    With overlong, overlong UTF-8 sequences are folded to the ASCII character they smuggle
+    """
+    for _ in range(depth):
+        if '%' not in s:
+            break
+        decoded = unquote(OVERLONG_RE.sub(_overlong_char, s) if overlong else s)
+        if decoded == s:
+            break
+        s = decoded
+    return s
+
+NormalizedURL = namedtuple('NormalizedURL', [
+    'raw_query', 'query', 'query_lower', 'raw_path', 'base', 'rest', 'rest_decoded', 'rest_lower'
+])
+
+def normalize_url(url, depth=DECODE_DEPTH, overlong=DECODE_OVERLONG):
+    """
+    Decode a URL once into the shared views used by every feature
+    base is the raw scheme/host/path prefix and rest the raw query and fragment;
+    the decoded query is reused for the decoded rest, since decoding never
+    crosses the literal '?' and '#' separators. Returns None if the URL can't be parsed
+    """
+    if not isinstance(url, str):
+        return None
+    try:
+        parsed = urlparse(url)
+    except ValueError:
+        return None
+    base_end = BASE_RE.match(url).end()
+    base, rest = url[:base_end], url[base_end:]
+    query = percent_decode(parsed.query, depth, overlong)
+    
+    fragment_start = rest.find('#')
+    if fragment_start < 0:
+        fragment_start = len(rest)
+    rest_decoded = ""
+    if rest.startswith('?'):
+        # urlparse drops tabs and newlines, so its query may differ from the raw slice
+        raw_slice = rest[1:fragment_start]
+        rest_decoded = '?' + (query if raw_slice == parsed.query else percent_decode(raw_slice, depth, overlong))
+    rest_decoded += percent_decode(rest[fragment_start:], depth, overlong)
+    
+    return NormalizedURL(
+        raw_query=parsed.query,
+        query=query,
+        query_lower=query.lower(),
+        raw_path=parsed.path,
+        base=base,
+        rest=rest,
+        rest_decoded=rest_decoded,
+        rest_lower=rest_decoded.lower()
+    )
+
+BaseFeatures = namedtuple('BaseFeatures', [
+    'path_entropy', 'decoded', 'length', 'char_counts', 'special_chars', 'encoded_chars', 'xss_found',
+    'event_handler', 'javascript_protocol', 'encoded_script', 'html_entities', 'traversal', 'file_inclusion'
+])
+
+@lru_cache(maxsize=PATH_CACHE_SIZE)
+def _base_features(base, raw_path, depth=DECODE_DEPTH, overlong=DECODE_OVERLONG):
+    """
+    Path-level part of the full-URL features, memoized per URL prefix
+    The prefix never contains '?' or '#', so decoding, counts and pattern matches
+    on the full URL split exactly into this part plus the query/fragment part
+    """
+    path = percent_decode(raw_path, depth, overlong)
+    decoded = percent_decode(base, depth, overlong)
+    decoded_lower = decoded.lower()
+    return BaseFeatures(
+        path_entropy=entropy(path),
+        decoded=decoded,
+        length=len(decoded),
+        char_counts=Counter(decoded),
+        special_chars=len(SPECIAL_CHARS_RE.findall(decoded)),
+        encoded_chars=len(ENCODED_CHARS_RE.findall(base)),
+        xss_found=frozenset(XSS_MATCHER.match(decoded_lower)),
+        event_handler=bool(XSS_EVENT_HANDLER_RE.search(decoded_lower)),
+        javascript_protocol=bool(XSS_JS_PROTOCOL_RE.search(decoded_lower)),
+        encoded_script=bool(XSS_ENCODED_SCRIPT_RE.search(base)),
+        html_entities=bool(XSS_HTML_ENTITY_RE.search(decoded)),
+        traversal=bool(TRAVERSAL_RE.search(decoded)),
+        file_inclusion=bool(FILE_INCLUSION_RE.search(decoded_lower))
+    )
+
+path_cache_info = _base_features.cache_info
+
+def _param_stats(raw_query, depth=DECODE_DEPTH, overlong=DECODE_OVERLONG):
+    """
+    Parameter count, average value length and suspicious value count of a raw query string
+    Values are decoded like percent_decode: parse_qs makes the first pass (overlong
+    sequences are re-escaped first so they can't forge separators), the rest peel nesting
+    """
+    if overlong:
+        raw_query = OVERLONG_RE.sub(_overlong_escape, raw_query)
+    params = parse_qs(raw_query)
+    param_values = [percent_decode(v, depth - 1, overlong) for values in params.values() for v in values]
+    param_value_lengths = [len(v) for v in param_values]
+    avg_param_length = sum(param_value_lengths) / len(param_value_lengths) if param_value_lengths else 0
+    suspicious_param_chars = sum(1 for v in param_values if any(c in v for c in SUSPICIOUS_PARAM_CHARS))
+    return len(params), avg_param_length, suspicious_param_chars
+
 def extract_features(url):
     """
     Enhanced feature extraction for better ML model performance
     Extracts 15+ features for comprehensive analysis
+    Unparseable URLs give an all-NaN vector, like the batch rows (see failed_rows)
     """
     try:
-        # URL parsing
-        parsed = urlparse(url)
-        query = unquote(parsed.query) if parsed.query else ""
-        path = unquote(parsed.path) if parsed.path else ""
-        full_url = unquote(url)
+        # URL parsing; path-level features come from the prefix memo
+        url = normalize_url(url)
+        base_features = _base_features(url.base, url.raw_path)
+        raw_query, query, query_lower = url.raw_query, url.query, url.query_lower
+        rest, rest_decoded, rest_lower = url.rest, url.rest_decoded, url.rest_lower
         
         # Basic tokenization
-        tokens = re.split(r'\W+', query.lower())
-        path_tokens = re.split(r'\W+', path.lower())
-        all_tokens = tokens + path_tokens
+        tokens = SPLIT_RE.split(query_lower)
         
         # Token statistics
         token_lengths = [len(t) for t in tokens if t]
-        token_count = len([t for t in tokens if t])
+        token_count = len(token_lengths)
         token_length_sum = sum(token_lengths)
         avg_token_length = sum(token_lengths) / len(token_lengths) if token_lengths else 0
         max_token_length = max(token_lengths) if token_lengths else 0
         
         # Character statistics
-        url_length = len(full_url)
+        url_length = base_features.length + len(rest_decoded)
         query_length = len(query)
-        path_length = len(path)
         
         # Special character counts
-        special_chars = len(re.findall(r'[<>"\';(){}[\]\\]', full_url))
-        encoded_chars = len(re.findall(r'%[0-9A-Fa-f]{2}', url))
-        numeric_chars = len(re.findall(r'\d', query))
+        special_chars = base_features.special_chars + len(SPECIAL_CHARS_RE.findall(rest_decoded))
+        encoded_chars = base_features.encoded_chars + len(ENCODED_CHARS_RE.findall(rest))
+        numeric_chars = len(DIGIT_RE.findall(query))
         
         # SQL Injection patterns
-        sql_keywords = ['select', 'union', 'insert', 'update', 'delete', 'drop', 'create', 'alter']
-        sql_operators = ['or', 'and', 'not', 'like', 'in', 'exists']
-        sql_functions = ['concat', 'substring', 'ascii', 'char', 'exec']
-        
-        sql_keyword_count = sum(1 for kw in sql_keywords if kw in query.lower())
-        sql_operator_count = sum(1 for op in sql_operators if op in query.lower())
-        sql_function_count = sum(1 for func in sql_functions if func in query.lower())
+        sql_keyword_count, sql_operator_count, sql_function_count = SQL_MATCHER.count(query_lower)
         
         # Advanced SQL patterns
-        sql_comment_pattern = int(bool(re.search(r'(--|#|/\*)', query)))
-        sql_quote_pattern = int(bool(re.search(r"'.*'|\".*\"", query)))
-        sql_equals_pattern = int(bool(re.search(r"\b(or|and)\b.*=", query.lower())))
-        sql_union_pattern = int(bool(re.search(r'union.*select', query.lower())))
+        sql_comment_pattern = int(bool(SQL_COMMENT_RE.search(query)))
+        sql_quote_pattern = int(bool(SQL_QUOTE_RE.search(query)))
+        sql_equals_pattern = int(bool(SQL_EQUALS_RE.search(query_lower)))
+        sql_union_pattern = int(bool(SQL_UNION_RE.search(query_lower)))
         
         # XSS patterns
-        xss_keywords = ['script', 'alert', 'prompt', 'confirm', 'eval', 'onclick', 'onload', 'onerror']
-        xss_tags = ['<script>', '<iframe>', '<object>', '<embed>', '<form>', '<img>', '<svg>']
-        
-        xss_keyword_count = sum(1 for kw in xss_keywords if kw in full_url.lower())
-        xss_tag_count = sum(1 for tag in xss_tags if tag in full_url.lower())
+        xss_keyword_count, xss_tag_count = XSS_MATCHER.group_counts(
+            base_features.xss_found | XSS_MATCHER.match(rest_lower))
         
         # Advanced XSS patterns
-        xss_event_handler = int(bool(re.search(r'on\w+\s*=', full_url.lower())))
-        xss_javascript_protocol = int(bool(re.search(r'javascript:', full_url.lower())))
-        xss_encoded_script = int(bool(re.search(r'%3[Cc]script', url)))
-        xss_html_entities = int(bool(re.search(r'&[a-zA-Z]+;', full_url)))
+        xss_event_handler = int(base_features.event_handler or bool(XSS_EVENT_HANDLER_RE.search(rest_lower)))
+        xss_javascript_protocol = int(base_features.javascript_protocol or bool(XSS_JS_PROTOCOL_RE.search(rest_lower)))
+        xss_encoded_script = int(base_features.encoded_script or bool(XSS_ENCODED_SCRIPT_RE.search(rest)))
+        xss_html_entities = int(base_features.html_entities or bool(XSS_HTML_ENTITY_RE.search(rest_decoded)))
         
         # Entropy calculations
         query_entropy = entropy(query)
-        path_entropy = entropy(path)
-        url_entropy = entropy(full_url)
+        path_entropy = base_features.path_entropy
+        url_counts = base_features.char_counts.copy()
+        url_counts.update(rest_decoded)
+        url_entropy = _counts_entropy(url_counts, url_length)
         
         # Parameter analysis
-        params = parse_qs(parsed.query)
-        param_count = len(params)
-        param_values = [v for values in params.values() for v in values]
-        param_value_lengths = [len(v) for v in param_values]
-        avg_param_length = sum(param_value_lengths) / len(param_value_lengths) if param_value_lengths else 0
-        max_param_length = max(param_value_lengths) if param_value_lengths else 0
-        
-        # Suspicious parameter patterns
-        suspicious_param_chars = sum(1 for v in param_values if any(c in v for c in '<>"\';()'))
+        param_count, avg_param_length, suspicious_param_chars = _param_stats(raw_query)
         
         # Directory traversal patterns
-        directory_traversal = int(bool(re.search(r'\.\./', full_url)))
+        directory_traversal = int(base_features.traversal or bool(TRAVERSAL_RE.search(rest_decoded)))
         
         # File inclusion patterns  
-        file_inclusion = int(bool(re.search(r'(file://|ftp://|data:)', full_url.lower())))
+        file_inclusion = int(base_features.file_inclusion or bool(FILE_INCLUSION_RE.search(rest_lower)))
         
         # Command injection patterns
-        command_injection = int(bool(re.search(r'[;&|`$()]', query)))
+        command_injection = int(bool(COMMAND_INJECTION_RE.search(query)))
         
         # Feature vector (30 features total)
         features = np.array([
@@ -123,7 +285,7 @@ def extract_features(url):
             sql_quote_pattern,
             sql_equals_pattern,
             sql_union_pattern,
-            int(bool(re.search(r"'.*or.*'", query.lower()))),
+            int(bool(SQL_OR_INJECTION_RE.search(query_lower))),
             
             # XSS features (6 features)
             xss_keyword_count,
@@ -152,5 +314,185 @@ def extract_features(url):
         return features
         
     except Exception as e:
-        # Return zero vector if extraction fails
-        return np.zeros(30)
\ No newline at end of file
+        # NaN vector if extraction fails, so it can't pass for a real one
+        return np.full(N_FEATURES, np.nan)
+
+def entropy_batch(strings):
+    """
+    Shannon entropy of every string in a sequence, computed column-wise
+    Character counts come from one np.unique over all (row, codepoint) pairs
+    """
+    strings = list(strings)
+    lengths = np.fromiter((len(s) for s in strings), dtype=np.int64, count=len(strings))
+    if lengths.sum() == 0:
+        return np.zeros(len(strings))
+    codes = np.frombuffer(''.join(strings).encode('utf-32-le', 'surrogatepass'), dtype=np.uint32)
+    rows = np.repeat(np.arange(len(strings), dtype=np.int64), lengths)
+    keys, counts = np.unique(rows * 0x110000 + codes, return_counts=True)
+    key_rows = keys // 0x110000
+    p = counts / lengths[key_rows]
+    return np.bincount(key_rows, weights=-p * np.log2(p), minlength=len(strings))
+
+def extract_features_batch(urls):
+    """
+    Vectorized feature extraction for a whole column of URLs
+    Accepts a list or pandas Series and returns a contiguous (N, 32) float32 matrix
+    whose rows match extract_features; unparseable URLs get a NaN row (see failed_rows)
+    """
+    parts = [normalize_url(u) for u in urls]
+    features = np.full((len(parts), N_FEATURES), np.nan, dtype=np.float32)
+    ok = np.fromiter((p is not None for p in parts), dtype=bool, count=len(parts))
+    parts = [p for p in parts if p is not None]
+    if not parts:
+        return features
+    
+    raw_query, query, query_lower, raw_path, base, rest, rest_decoded, rest_lower = (
+        pd.Series(col, dtype=object) for col in zip(*parts))
+    
+    def count(texts, pattern):
+        return texts.str.count(pattern).to_numpy(dtype=np.float64)
+    
+    def flag(texts, pattern):
+        return texts.str.contains(pattern).to_numpy(dtype=bool)
+    
+    # Path-level features once per distinct prefix, broadcast back to the rows
+    base_codes, base_uniques = pd.factorize(base)
+    _, first_rows = np.unique(base_codes, return_index=True)
+    base_features = [_base_features(b, raw_path[i]) for b, i in zip(base_uniques, first_rows)]
+    
+    def per_base(field, dtype=np.float64):
+        return np.array([getattr(b, field) for b in base_features], dtype=dtype)[base_codes]
+    
+    # Token statistics
+    token_count = count(query_lower, TOKEN_RE)
+    token_length_sum = count(query_lower, WORD_RE)
+    avg_token_length = np.divide(token_length_sum, token_count,
+                                 out=np.zeros(len(parts)), where=token_count > 0)
+    token_lengths = query_lower.str.findall(TOKEN_RE).explode().str.len()
+    max_token_length = token_lengths.groupby(level=0).max().fillna(0).to_numpy(dtype=np.float64)
+    
+    # Keyword counts and parameter analysis
+    sql_counts = np.array([SQL_MATCHER.count(q) for q in query_lower], dtype=np.float64)
+    xss_counts = np.array([
+        XSS_MATCHER.group_counts(base_features[code].xss_found | XSS_MATCHER.match(r))
+        for code, r in zip(base_codes, rest_lower)
+    ], dtype=np.float64)
+    param_stats = np.array([_param_stats(q) for q in raw_query], dtype=np.float64)
+    
+    # Full URL text for the entropy column
+    full_url = np.array([b.decoded for b in base_features], dtype=object)[base_codes] + rest_decoded.to_numpy()
+    
+    columns = [
+        # Basic statistics
+        token_count,
+        token_length_sum,
+        avg_token_length,
+        max_token_length,
+        per_base('length') + rest_decoded.str.len().to_numpy(dtype=np.float64),
+        
+        # Character analysis
+        per_base('special_chars') + count(rest_decoded, SPECIAL_CHARS_RE),
+        per_base('encoded_chars') + count(rest, ENCODED_CHARS_RE),
+        count(query, DIGIT_RE),
+        query.str.len().to_numpy(dtype=np.float64),
+        
+        # SQL injection features
+        sql_counts[:, 0],
+        sql_counts[:, 1],
+        sql_counts[:, 2],
+        flag(query, SQL_COMMENT_RE),
+        flag(query, SQL_QUOTE_RE),
+        flag(query_lower, SQL_EQUALS_RE),
+        flag(query_lower, SQL_UNION_RE),
+        flag(query_lower, SQL_OR_INJECTION_RE),
+        
+        # XSS features
+        xss_counts[:, 0],
+        xss_counts[:, 1],
+        per_base('event_handler', bool) | flag(rest_lower, XSS_EVENT_HANDLER_RE),
+        per_base('javascript_protocol', bool) | flag(rest_lower, XSS_JS_PROTOCOL_RE),
+        per_base('encoded_script', bool) | flag(rest, XSS_ENCODED_SCRIPT_RE),
+        per_base('html_entities', bool) | flag(rest_decoded, XSS_HTML_ENTITY_RE),
+        
+        # Entropy features
+        entropy_batch(query),
+        per_base('path_entropy'),
+        entropy_batch(full_url),
+        
+        # Parameter analysis
+        param_stats[:, 0],
+        param_stats[:, 1],
+        param_stats[:, 2],
+        
+        # Other attack patterns
+        per_base('traversal', bool) | flag(rest_decoded, TRAVERSAL_RE),
+        per_base('file_inclusion', bool) | flag(rest_lower, FILE_INCLUSION_RE),
+        flag(query, COMMAND_INJECTION_RE)
+    ]
+    
+    features[ok] = np.column_stack(columns)
+    return features
+
+def parses(url):
+    """Whether url is a string urlparse accepts, i.e. one extraction won't fail on"""
+    if not isinstance(url, str):
+        return False
+    try:
+        urlparse(url)
+    except ValueError:
+        return False
+    return True
+
+def failed_rows(features):
+    """Mask of the rows of a feature matrix (or flag of one vector) whose URL could not be parsed"""
+    return np.isnan(features).any(axis=-1)
+
+def make_extraction_pool(workers=None):
+    """ProcessPoolExecutor for extract_features_parallel, started with POOL_START_METHOD"""
+    return ProcessPoolExecutor(
+        max_workers=workers or os.cpu_count() or 1,
+        mp_context=multiprocessing.get_context(POOL_START_METHOD)
+    )
+
+def extract_features_parallel(urls, workers=None, chunk_size=None, progress=None, pool=None):
+    """
+    Parallel extract_features_batch over a process pool
+    URLs are split into chunks, fanned out to `workers` processes (default: all cores)
+    and reassembled in their original order; progress(done, total) is called
+    each time a chunk completes. By default every worker gets one chunk (of at
+    least PARALLEL_MIN_CHUNK URLs). Pass a long-lived make_extraction_pool() as `pool`
+    (with `workers` set to its size) to avoid starting one per call
+    """
+    urls = list(urls)
+    workers = workers or os.cpu_count() or 1
+    if chunk_size is None:
+        chunk_size = max(PARALLEL_MIN_CHUNK, math.ceil(len(urls) / workers))
+    features = np.zeros((len(urls), N_FEATURES), dtype=np.float32)
+    starts = range(0, len(urls), chunk_size)
+    
+    if workers == 1 or len(starts) <= 1:
+        for start in starts:
+            block = extract_features_batch(urls[start:start + chunk_size])
+            features[start:start + len(block)] = block
+            if progress:
+                progress(start + len(block), len(urls))
+        return features
+    
+    owned = pool is None
+    if owned:
+        pool = make_extraction_pool(workers)
+    try:
+        futures = {pool.submit(extract_features_batch, urls[start:start + chunk_size]): start for start in starts}
+        done = 0
+        for future in as_completed(futures):
+            block = future.result()
+            start = futures[future]
+            features[start:start + len(block)] = block
+            done += len(block)
+            if progress:
+                progress(done, len(urls))
+    finally:
+        if owned:
+            pool.shutdown()
+    
+    return features
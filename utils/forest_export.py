@@ -0,0 +1,225 @@
+# utils/forest_export.py
+import os
+from collections import namedtuple
+import joblib
+import numpy as np
+
+# Trees evaluated per stage by FlatForest.predict_early_exit
+EARLY_EXIT_STAGE_SIZE = 10
+
+EarlyExit = namedtuple('EarlyExit', ['labels', 'risk', 'trees_used'])
+
+class FlatForest:
+    """
+    A trained RandomForestClassifier packed into flat NumPy arrays
+    All trees share one node table (feature, threshold, left/right child and
+    class-probability value per node); roots holds each tree's first node.
+    Leaves point to themselves, so every tree can be advanced one level at a time
+    for a whole batch with plain vectorized indexing
+    """
+
+    def __init__(self, feature, threshold, left, right, value, roots, classes_, max_depth, source=None):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.value = value
+        self.roots = roots
+        self.classes_ = classes_
+        self.max_depth = max_depth
+        # Fingerprint of the model file this forest was exported from
+        self.source = source
+
+    @classmethod
+    def from_model(cls, model):
+        """Export the trees of a fitted single-output RandomForestClassifier"""
+        features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+        offset = 0
+        for estimator in model.estimators_:
+            tree = estimator.tree_
+            nodes = np.arange(tree.node_count)
+            leaf = tree.children_left == -1
+
+            value = tree.value[:, 0, :len(model.classes_)].astype(np.float64)
+            sums = value.sum(axis=1, keepdims=True)
+            # Older scikit-learn stores class counts and normalizes them at predict time
+            if np.any(sums > 1 + 1e-6):
+                sums[sums == 0] = 1
+                value = value / sums
+
+            features.append(np.where(leaf, 0, tree.feature))
+            thresholds.append(np.where(leaf, np.inf, tree.threshold))
+            lefts.append(np.where(leaf, nodes, tree.children_left) + offset)
+            rights.append(np.where(leaf, nodes, tree.children_right) + offset)
+            values.append(value)
+            roots.append(offset)
+            offset += tree.node_count
+
+        return cls(
+            feature=np.concatenate(features).astype(np.int32),
+            threshold=np.concatenate(thresholds).astype(np.float64),
+            left=np.concatenate(lefts).astype(np.int32),
+            right=np.concatenate(rights).astype(np.int32),
+            value=np.concatenate(values),
+            roots=np.array(roots, dtype=np.int32),
+            classes_=np.asarray(model.classes_),
+            max_depth=max(estimator.tree_.max_depth for estimator in model.estimators_)
+        )
+
+    @property
+    def n_estimators(self):
+        return len(self.roots)
+
+    @property
+    def node_count(self):
+        return len(self.feature)
+
+    def _levels(self, X, roots=None):
+        """Yield (nodes, children) of every (row, tree) pair for each level of the descent"""
+        # Same comparison as scikit-learn: float32 features against float64 thresholds
+        X = np.asarray(X, dtype=np.float32)
+        roots = self.roots if roots is None else roots
+        rows = np.arange(len(X))[:, None]
+        nodes = np.broadcast_to(roots, (len(X), len(roots))).astype(np.intp)
+        for _ in range(self.max_depth):
+            go_left = X[rows, self.feature[nodes]] <= self.threshold[nodes]
+            children = np.where(go_left, self.left[nodes], self.right[nodes])
+            yield nodes, children
+            nodes = children
+
+    def apply(self, X):
+        """Leaf node index reached in every tree by every row, shape (n_rows, n_trees)"""
+        return self.apply_trees(X, self.roots)
+
+    def apply_trees(self, X, roots):
+        """Leaf node index reached by every row in the trees starting at `roots`"""
+        nodes = np.broadcast_to(roots, (len(X), len(roots))).astype(np.intp)
+        for _, nodes in self._levels(X, roots):
+            pass
+        return nodes
+
+    def contributions(self, X, class_index=1):
+        """
+        Saabas-style per-feature contributions to the probability of classes_[class_index]
+        Each split's change in node value along a row's decision path is credited to the
+        split feature and averaged over trees, so a row's contributions plus the mean
+        root value add up to its predicted probability
+        """
+        n_rows, n_features = np.shape(X)
+        value = self.value[:, class_index]
+        rows = np.arange(n_rows)[:, None] * n_features
+        totals = np.zeros(n_rows * n_features)
+        for nodes, children in self._levels(X):
+            # Leaves point to themselves, so finished trees add zero
+            totals += np.bincount((rows + self.feature[nodes]).ravel(),
+                                  weights=(value[children] - value[nodes]).ravel(),
+                                  minlength=len(totals))
+        return totals.reshape(n_rows, n_features) / self.n_estimators
+
+    def predict_early_exit(self, X, threshold=0.5, stage_size=EARLY_EXIT_STAGE_SIZE, delta=None, class_index=1):
+        """
+        Staged inference that stops for a row once its label is settled
+        Trees are evaluated stage_size at a time, in order. A row stops as soon as the
+        value range of the remaining trees can no longer move its final mean across the
+        threshold, and takes the side its final mean is bound to, so those labels always
+        match the full forest. With delta, a row also stops once a Hoeffding bound puts
+        the threshold outside its running mean with probability 1 - delta, and is
+        labelled by that running mean.
+        risk is the running mean over the trees used, exact for rows that used all of them
+        (a bound-stopped row's label can disagree with its partial risk)
+        """
+        X = np.asarray(X, dtype=np.float32)
+        value = self.value[:, class_index]
+        n_trees = self.n_estimators
+        # Smallest and largest leaf value of each tree, summed over the trees still to come
+        tree_of = np.repeat(np.arange(n_trees), np.diff(np.append(self.roots, self.node_count)))
+        leaf = self.left == np.arange(self.node_count)
+        tree_min = np.full(n_trees, np.inf)
+        tree_max = np.full(n_trees, -np.inf)
+        np.minimum.at(tree_min, tree_of[leaf], value[leaf])
+        np.maximum.at(tree_max, tree_of[leaf], value[leaf])
+        remaining_min = np.append(np.cumsum(tree_min[::-1])[::-1], 0)
+        remaining_max = np.append(np.cumsum(tree_max[::-1])[::-1], 0)
+
+        totals = np.zeros(len(X))
+        trees_used = np.zeros(len(X), dtype=np.int64)
+        labels = np.zeros(len(X), dtype=bool)
+        active = np.arange(len(X))
+        for start in range(0, n_trees, stage_size):
+            if not len(active):
+                break
+            end = min(start + stage_size, n_trees)
+            leaves = self.apply_trees(X[active], self.roots[start:end])
+            totals[active] = np.cumsum(np.column_stack([totals[active], value[leaves]]), axis=1)[:, -1]
+            trees_used[active] = end
+
+            lower = (totals[active] + remaining_min[end]) / n_trees
+            upper = (totals[active] + remaining_max[end]) / n_trees
+            bounded = (lower > threshold) | (upper <= threshold)
+            labels[active[bounded]] = lower[bounded] > threshold
+            decided = bounded
+            if delta is not None and end < n_trees:
+                mean = totals[active] / end
+                margin = np.sqrt(np.log(2 / delta) / (2 * end))
+                likely = ~bounded & (np.abs(mean - threshold) > margin)
+                labels[active[likely]] = mean[likely] > threshold
+                decided = bounded | likely
+            active = active[~decided]
+
+        risk = totals / np.maximum(trees_used, 1)
+        return EarlyExit(
+            labels=self.classes_[np.where(labels, class_index, 1 - class_index)],
+            risk=risk,
+            trees_used=trees_used
+        )
+
+    def bias(self, class_index=1):
+        """Mean root value of classes_[class_index], the base of every contribution sum"""
+        return self.value[self.roots, class_index].mean()
+
+    def predict_proba(self, X):
+        """
+        Class probabilities identical to the source model's predict_proba
+        Tree outputs are summed in tree order (cumsum is sequential, matching
+        scikit-learn's running total) and then averaged
+        """
+        leaves = self.apply(X)
+        if leaves.size == 0:
+            return np.zeros((len(leaves), len(self.classes_)))
+        total = np.cumsum(self.value[leaves], axis=1)[:, -1]
+        return total / self.n_estimators
+
+    def predict(self, X):
+        return self.classes_[self.predict_proba(X).argmax(axis=1)]
+
+    def save(self, path):
+        """Uncompressed joblib dump, so the node arrays can be memory-mapped on load"""
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        joblib.dump(self, tmp_path)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path, mmap_mode='r'):
+        """Load a saved forest with its arrays memory-mapped read-only by default"""
+        return joblib.load(path, mmap_mode=mmap_mode)
+
+def model_fingerprint(model_path):
+    """(size, mtime) of a model file, used to detect a stale export"""
+    stat = os.stat(model_path)
+    return stat.st_size, stat.st_mtime_ns
+
+def load_flat_forest(model, model_path, flat_path, mmap_mode='r'):
+    """
+    FlatForest of the model stored at model_path, memory-mapped from flat_path
+    The export is rewritten first when missing or made from another model file;
+    every process mapping the same file shares its physical pages
+    """
+    fingerprint = model_fingerprint(model_path)
+    if os.path.exists(flat_path):
+        forest = FlatForest.load(flat_path, mmap_mode=mmap_mode)
+        if forest.source == fingerprint:
+            return forest
+    forest = FlatForest.from_model(model)
+    forest.source = fingerprint
+    forest.save(flat_path)
+    return FlatForest.load(flat_path, mmap_mode=mmap_mode)
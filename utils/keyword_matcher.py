@@ -0,0 +1,72 @@
+# utils/keyword_matcher.py
+from collections import deque
+
+class KeywordMatcher:
+    """
+    Aho-Corasick automaton over groups of keyword signatures
+    Walks a text once and reports how many distinct keywords of each group it contains,
+    the same result as counting `kw in text` for every keyword of every group
+    """
+
+    def __init__(self, groups):
+        self.groups = [list(keywords) for keywords in groups]
+
+        # Trie of all keywords, outputs hold (group, keyword) pairs ending at a state
+        goto = [{}]
+        outputs = [set()]
+        for group_index, keywords in enumerate(self.groups):
+            for keyword in keywords:
+                state = 0
+                for ch in keyword:
+                    if ch not in goto[state]:
+                        goto.append({})
+                        outputs.append(set())
+                        goto[state][ch] = len(goto) - 1
+                    state = goto[state][ch]
+                outputs[state].add((group_index, keyword))
+
+        # Failure links in breadth-first order, merging outputs of suffix states
+        fail = [0] * len(goto)
+        order = []
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            order.append(state)
+            for ch, child in goto[state].items():
+                queue.append(child)
+                fallback = fail[state]
+                while fallback and ch not in goto[fallback]:
+                    fallback = fail[fallback]
+                fail[child] = goto[fallback].get(ch, 0)
+                outputs[child] |= outputs[fail[child]]
+
+        # Complete the transition table so the walk never follows failure links
+        self._delta = [dict(goto[0])] + [None] * (len(goto) - 1)
+        for state in order:
+            transitions = dict(self._delta[fail[state]])
+            transitions.update(goto[state])
+            self._delta[state] = transitions
+        self._outputs = [frozenset(out) if out else None for out in outputs]
+
+    def match(self, text):
+        """Set of (group_index, keyword) pairs found in text"""
+        delta = self._delta
+        outputs = self._outputs
+        found = set()
+        state = 0
+        for ch in text:
+            state = delta[state].get(ch, 0)
+            if outputs[state] is not None:
+                found |= outputs[state]
+        return found
+
+    def group_counts(self, found):
+        """Number of distinct keywords of each group in a set returned by match()"""
+        counts = [0] * len(self.groups)
+        for group_index, _ in found:
+            counts[group_index] += 1
+        return counts
+
+    def count(self, text):
+        """Number of distinct keywords of each group found in text"""
+        return self.group_counts(self.match(text))
@@ -0,0 +1,155 @@
+# utils/model_registry.py
+import os
+import time
+import threading
+import joblib
+import numpy as np
+from utils.cascade import CascadePrefilter
+from utils.explanations import ExplanationService, shap_contributions
+from utils.forest_export import load_flat_forest, model_fingerprint
+from utils.scoring import ScoringEngine
+
+# Seconds between checks of the model file
+POLL_INTERVAL = 5.0
+
+def version_name(fingerprint):
+    """Readable model version from a (size, mtime_ns) fingerprint"""
+    size, mtime_ns = fingerprint
+    return f"{time.strftime('%Y%m%d-%H%M%S', time.localtime(mtime_ns / 1e9))}-{size}"
+
+class LoadedModel:
+    """
+    One model version with everything derived from it
+    The scoring engines are built on load; the SHAP explainer and explanation
+    services are built on first use (or while warming, see ModelRegistry).
+    prefilter is the CascadePrefilter calibrated with this model, if any
+    """
+
+    def __init__(self, version, model, flat_forest, feature_names, early_exit_delta=0.01, prefilter=None):
+        self.version = version
+        self.model = model
+        self.flat_forest = flat_forest
+        self.prefilter = prefilter
+        self.feature_names = feature_names
+        self.engine = ScoringEngine(model, fast_model=flat_forest, version=version)
+        self.early_exit_engine = ScoringEngine(model, fast_model=flat_forest, version=version,
+                                               early_exit=True, early_exit_delta=early_exit_delta)
+        self._explainer = None
+        self._services = {}
+        self._lock = threading.Lock()
+
+    def explainer(self):
+        """SHAP explainer of this version; shap is only imported here"""
+        with self._lock:
+            if self._explainer is None:
+                import shap
+                self._explainer = shap.Explainer(self.model)
+            return self._explainer
+
+    @property
+    def has_explainer(self):
+        return self._explainer is not None
+
+    def explanation_service(self, mode="exact"):
+        """Cached ExplanationService: 'exact' (SHAP) or 'fast' (decision paths)"""
+        with self._lock:
+            if mode not in self._services:
+                if mode == "fast":
+                    contributions = self.flat_forest.contributions
+                else:
+                    contributions = lambda X: shap_contributions(self.explainer(), X)
+                self._services[mode] = ExplanationService(contributions, self.feature_names, top_k=15)
+            return self._services[mode]
+
+    def warm(self, with_explainer=False):
+        """Run every inference path once so the first real request pays no setup cost"""
+        probe = np.zeros((self.engine.fast_max_rows + 1, len(self.feature_names)), dtype=np.float32)
+        self.engine.score(probe[:1])
+        self.engine.score(probe)
+        self.early_exit_engine.score(probe[:1])
+        self.explanation_service("fast").explain(probe[:1])
+        if with_explainer:
+            self.explainer()(probe[:1])
+
+class ModelRegistry:
+    """
+    Watches the model file and hot-swaps new versions without downtime
+    A changed file is loaded and warmed in a background thread while the current
+    version keeps serving; the new LoadedModel then replaces it in a single
+    reference assignment. Callers take current() once per scan and use that
+    snapshot throughout, so in-flight scans finish on the version they started with.
+    The prefilter at prefilter_path is loaded with each model file, so the two swap
+    together (training writes the prefilter before the model)
+    """
+
+    def __init__(self, model_path, flat_model_path, feature_names, early_exit_delta=0.01,
+                 poll_interval=POLL_INTERVAL, prefilter_path=None):
+        self.model_path = model_path
+        self.flat_model_path = flat_model_path
+        self.prefilter_path = prefilter_path
+        self.feature_names = feature_names
+        self.early_exit_delta = early_exit_delta
+        self.poll_interval = poll_interval
+        self.last_error = None
+        self._failed = None
+        self._fingerprint = model_fingerprint(model_path)
+        self._current = self._load(self._fingerprint)
+        self._current.warm()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _load(self, fingerprint):
+        model = joblib.load(self.model_path)
+        flat_forest = load_flat_forest(model, self.model_path, self.flat_model_path)
+        prefilter = None
+        if self.prefilter_path is not None and os.path.exists(self.prefilter_path):
+            prefilter = CascadePrefilter.load(self.prefilter_path)
+        return LoadedModel(version_name(fingerprint), model, flat_forest, self.feature_names,
+                           early_exit_delta=self.early_exit_delta, prefilter=prefilter)
+
+    def current(self):
+        """The live model version"""
+        return self._current
+
+    def check(self):
+        """
+        Load, warm and swap in the model file if it changed since the last check
+        Returns True when a new version went live
+        """
+        try:
+            fingerprint = model_fingerprint(self.model_path)
+        except OSError:
+            return False
+        if fingerprint in (self._fingerprint, self._failed):
+            return False
+        try:
+            candidate = self._load(fingerprint)
+            # A file still being written changes again under us; retry on the next check
+            if model_fingerprint(self.model_path) != fingerprint:
+                return False
+            candidate.warm(with_explainer=self._current.has_explainer)
+        except Exception as e:
+            self._failed = fingerprint
+            self.last_error = f"{version_name(fingerprint)}: {e}"
+            return False
+        self._fingerprint = fingerprint
+        self._current = candidate
+        self.last_error = None
+        return True
+
+    def _watch(self):
+        while not self._stop.wait(self.poll_interval):
+            self.check()
+
+    def start(self):
+        """Start watching in a daemon thread"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._watch, name="model-registry", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
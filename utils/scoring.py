@@ -0,0 +1,142 @@
+# utils/scoring.py
+from collections import namedtuple
+import numpy as np
+import pandas as pd
+from utils.feature_extraction import extract_features_batch, failed_rows, parses
+
+# Rows sent to the model per predict_proba call
+SCORING_CHUNK_SIZE = 50000
+
+# Largest chunk routed to the flat forest; above this sklearn's compiled traversal is faster
+FAST_PATH_MAX_ROWS = 128
+
+Scores = namedtuple('Scores', ['labels', 'risk', 'confidence', 'trees_used'])
+
+class ScoringEngine:
+    """
+    Batched model inference over feature matrices
+    Makes one predict_proba call per chunk of rows and derives the labels from
+    the probabilities (classes_[argmax], as the forest's own predict does).
+    Small chunks go to fast_model (a FlatForest of the same model) when given,
+    avoiding sklearn's per-call overhead for interactive scans.
+    With early_exit, every chunk is scored by fast_model's staged inference, which
+    stops evaluating trees for a row once its label is settled (see
+    FlatForest.predict_early_exit; early_exit_delta enables the confidence bound).
+    version labels the model in scored results
+    """
+
+    def __init__(self, model, chunk_size=SCORING_CHUNK_SIZE, fast_model=None, fast_max_rows=FAST_PATH_MAX_ROWS,
+                 early_exit=False, early_exit_delta=None, version=None):
+        self.model = model
+        self.version = version
+        self.classes_ = model.classes_
+        self.chunk_size = chunk_size
+        self.fast_model = fast_model
+        self.fast_max_rows = fast_max_rows
+        if early_exit and fast_model is None:
+            raise ValueError("early_exit needs a fast_model")
+        self.early_exit = early_exit
+        self.early_exit_delta = early_exit_delta
+
+    def predict_proba(self, features):
+        """Class probabilities for every row of a feature matrix"""
+        features = np.asarray(features)
+        probas = np.zeros((len(features), len(self.classes_)))
+        for start in range(0, len(features), self.chunk_size):
+            chunk = features[start:start + self.chunk_size]
+            model = self.fast_model if self.fast_model is not None and len(chunk) <= self.fast_max_rows else self.model
+            probas[start:start + len(chunk)] = model.predict_proba(chunk)
+        return probas
+
+    def score(self, features):
+        """
+        Scores of every row: predicted label, malicious-class probability (risk),
+        probability of the predicted label (confidence) and number of trees evaluated
+        """
+        if self.early_exit:
+            return self._score_early_exit(features)
+        probas = self.predict_proba(features)
+        risk = probas[:, 1] if probas.shape[1] > 1 else np.zeros(len(probas))
+        return Scores(
+            labels=self.classes_[probas.argmax(axis=1)],
+            risk=risk,
+            confidence=probas.max(axis=1),
+            trees_used=np.full(len(probas), len(getattr(self.model, 'estimators_', ())))
+        )
+
+    def _score_early_exit(self, features):
+        features = np.asarray(features)
+        labels = np.empty(len(features), dtype=self.classes_.dtype)
+        risk = np.zeros(len(features))
+        trees_used = np.zeros(len(features), dtype=np.int64)
+        for start in range(0, len(features), self.chunk_size):
+            chunk = slice(start, start + self.chunk_size)
+            result = self.fast_model.predict_early_exit(features[chunk], delta=self.early_exit_delta)
+            labels[chunk] = result.labels
+            risk[chunk] = result.risk
+            trees_used[chunk] = result.trees_used
+        return Scores(labels=labels, risk=risk, confidence=np.maximum(risk, 1 - risk), trees_used=trees_used)
+
+def score_urls(urls, engine, traffic_analyzer, extract=extract_features_batch, prefilter=None):
+    """
+    Duplicate-aware batch scoring
+    The URL column is factorized into unique values plus an inverse index; features,
+    predictions and traffic types are computed once per unique URL and broadcast back,
+    giving one result row per input URL with its occurrence count in the batch.
+    With a CascadePrefilter, URLs it clears skip extraction and the model;
+    the Tier column records which stage decided each URL, Trees_Used how many trees
+    the model evaluated for it (0 when it wasn't scored) and Model_Version the
+    engine's model version. Non-string URLs and URLs the extractor can't
+    parse are reported with Status 'Error', never scored
+    """
+    codes, uniques = pd.factorize(pd.Series(list(urls), dtype=object), use_na_sentinel=False)
+    uniques = list(uniques)
+    valid = np.fromiter((isinstance(u, str) for u in uniques), dtype=bool, count=len(uniques))
+
+    status = np.full(len(uniques), 'Error', dtype=object)
+    confidence = np.full(len(uniques), '0%', dtype=object)
+    traffic_type = np.full(len(uniques), 'Unknown', dtype=object)
+    risk_score = np.zeros(len(uniques))
+    trees_used = np.zeros(len(uniques), dtype=np.int64)
+    tier = np.full(len(uniques), 'Model', dtype=object)
+    traffic_type[valid] = traffic_analyzer.classify_many(
+        [u for u, ok in zip(uniques, valid) if ok]).to_numpy(dtype=object)
+
+    if prefilter is not None:
+        cleared = valid & prefilter.clears(uniques)
+        cleared[cleared] = [parses(u) for u, c in zip(uniques, cleared) if c]
+        status[cleared] = 'Safe'
+        confidence[cleared] = 'N/A'
+        tier[cleared] = 'Prefilter'
+        valid &= ~cleared
+
+    valid_urls = [u for u, ok in zip(uniques, valid) if ok]
+    if valid_urls:
+        features = extract(valid_urls)
+        failed = failed_rows(features)
+        if failed.any():
+            # Unparseable URLs have no feature vector; scoring a filler row would call them benign
+            rows = np.flatnonzero(valid)[failed]
+            traffic_type[rows] = 'Unknown'
+            valid[rows] = False
+            features = features[~failed]
+    if valid.any():
+        scores = engine.score(features)
+
+        status[valid] = np.where(scores.labels.astype(bool), 'Malicious', 'Safe')
+        confidence[valid] = [f"{p*100:.1f}%" for p in scores.confidence]
+        risk_score[valid] = scores.risk
+        trees_used[valid] = scores.trees_used
+
+    occurrences = np.bincount(codes, minlength=len(uniques))
+    return pd.DataFrame({
+        'URL': np.array(uniques, dtype=object)[codes],
+        'Status': status[codes],
+        'Confidence': confidence[codes],
+        'Traffic_Type': traffic_type[codes],
+        'Risk_Score': risk_score[codes],
+        'Tier': tier[codes],
+        'Trees_Used': trees_used[codes],
+        'Occurrences': occurrences[codes],
+        'Model_Version': engine.version
+    })
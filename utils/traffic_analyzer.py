@@ -1,7 +1,75 @@
 # utils/traffic_analyzer.py
 import re
-from urllib.parse import urlparse
+import math
+import zlib
+from collections import Counter, OrderedDict, namedtuple
+from urllib.parse import urlsplit
 import numpy as np
+import pandas as pd
+
+# Characters counted by the "unusual character" anomaly signal
+UNUSUAL_CHARS = '<>"\';(){}[]\\'
+HEX_DIGITS = '0123456789ABCDEFabcdef'
+ANOMALY_KEYWORDS = ['script', 'alert', 'drop', 'union', 'select', 'exec']
+# Minimum anomaly score reported by detect_anomalies
+ANOMALY_THRESHOLD = 0.1
+
+AnomalyScores = namedtuple('AnomalyScores', ['scores', 'severity'])
+
+# BehaviorMonitor defaults: sliding window split into ring-buffer buckets, half-life
+# of the decayed baseline counters and the number of hosts/paths/clients tracked
+BEHAVIOR_WINDOW_SECONDS = 10
+BEHAVIOR_BUCKETS = 10
+BEHAVIOR_HALF_LIFE_SECONDS = 600
+BEHAVIOR_MAX_KEYS = 10000
+# Bits of the per-bucket payload sketch used to count distinct payloads
+PAYLOAD_SKETCH_BITS = 1024
+
+BEHAVIOR_SIGNALS = ('rate_spike', 'payload_diversity', 'suspicious_surge')
+BehaviorAlert = namedtuple('BehaviorAlert', ['timestamp', 'scope', 'key', 'signal', 'value', 'baseline'])
+
+def _split_leading_literal(pattern):
+    """
+    (char, rest) when a regex starts with a plain literal character, else (None, pattern)
+    Patterns with a top-level | or a quantified first character are left whole
+    """
+    depth = 0
+    in_class = False
+    i = 0
+    while i < len(pattern):
+        c = pattern[i]
+        if c == '\\':
+            i += 1
+        elif in_class:
+            in_class = c != ']'
+        elif c == '[':
+            in_class = True
+        elif c == '(':
+            depth += 1
+        elif c == ')':
+            depth -= 1
+        elif c == '|' and depth == 0:
+            return None, pattern
+        i += 1
+
+    if pattern[:1] == '\\' and len(pattern) > 1 and not pattern[1].isalnum():
+        lead, rest = pattern[1], pattern[2:]
+    elif pattern and pattern[0] not in '.^$*+?{}[]\\|()':
+        lead, rest = pattern[0], pattern[1:]
+    else:
+        return None, pattern
+    if rest[:1] in ('*', '+', '?', '{'):
+        return None, pattern
+    return lead, rest
+
+def _code_points(chars):
+    return np.array([ord(c) for c in chars], dtype=np.uint32)
+
+_KEYWORD_RE = re.compile('|'.join(ANOMALY_KEYWORDS))
+_PARAM_INJECTION_RE = re.compile(r'[=&].*[<>\'";]')
+
+def _lead_prefix(lead):
+    return re.escape(lead) if lead is not None else ''
 
 class TrafficAnalyzer:
     """
@@ -24,28 +92,104 @@ class TrafficAnalyzer:
             'Search': [r'/search/', r'/find/', r'\?q=', r'\?query='],
             'Gaming': [r'/game/', r'/play/', r'/score/', r'/level/']
         }
+        self.suspicious_patterns = [
+            r'<script',
+            r'javascript:',
+            r'alert\(',
+            r'onerror=',
+            r'onload=',
+            r'union.*select',
+            r'drop.*table',
+            r'1=1',
+            r"'.*or.*'",
+            r'--|#',
+            r'\.\./',
+            r'%3C.*%3E',  # URL encoded < >
+            r'%27',       # URL encoded '
+            r'%22',       # URL encoded "
+        ]
+        self._compile_patterns()
+    
+    def _compile_patterns(self):
+        """
+        Compile every category and suspicious pattern for single-scan matching
+        _scanner is one lookahead alternation of all distinct patterns, factored by
+        leading literal character, so a single finditer stops at every position where
+        at least one of them matches. At a hit, the named-group matchers of that
+        leading character name each pattern matching there in turn, which gives
+        exactly the set of patterns a separate re.search per pattern would find
+        """
+        patterns = list(dict.fromkeys(
+            [p for type_patterns in self.traffic_patterns.values() for p in type_patterns] + self.suspicious_patterns))
+        index = {pattern: i for i, pattern in enumerate(patterns)}
+        # Categories each pattern counts towards, once per listing
+        self._pattern_categories = [[] for _ in patterns]
+        for traffic_type, type_patterns in self.traffic_patterns.items():
+            for pattern in type_patterns:
+                self._pattern_categories[index[pattern]].append(traffic_type)
+        self._suspicious_indices = frozenset(index[p] for p in self.suspicious_patterns)
+        # Per-pattern view for classify_many: score added to each category, suspicious flag
+        self._patterns = [re.compile(p) for p in patterns]
+        self._category_weights = np.zeros((len(patterns), len(self.traffic_patterns)), dtype=np.int32)
+        for j, type_patterns in enumerate(self.traffic_patterns.values()):
+            for pattern in type_patterns:
+                self._category_weights[index[pattern], j] += 1
+        
+        # _matchers[lead][1][k] is the alternation of that lead's patterns from the k-th on
+        groups = {}
+        for i, pattern in enumerate(patterns):
+            lead, rest = _split_leading_literal(pattern)
+            groups.setdefault(lead, []).append((i, rest))
+        self._scanner = re.compile('(?=' + '|'.join(
+            _lead_prefix(lead) + '(?:' + '|'.join(f'(?:{rest})' for _, rest in members) + ')'
+            for lead, members in groups.items()
+        ) + ')')
+        self._matchers = {
+            lead: (
+                [i for i, _ in members],
+                [
+                    re.compile(_lead_prefix(lead) + '(?:' + '|'.join(
+                        f'(?P<p{j}>{rest})' for j, (_, rest) in enumerate(members) if j >= k) + ')')
+                    for k in range(len(members))
+                ]
+            )
+            for lead, members in groups.items()
+        }
+    
+    def _matched_patterns(self, url_lower):
+        """Indices of the compiled patterns found anywhere in url_lower, from one scan"""
+        found = set()
+        for hit in self._scanner.finditer(url_lower):
+            pos = hit.start()
+            for lead in (url_lower[pos], None):
+                if lead not in self._matchers:
+                    continue
+                indices, matchers = self._matchers[lead]
+                k = 0
+                while k < len(matchers):
+                    match = matchers[k].match(url_lower, pos)
+                    if match is None:
+                        break
+                    k = int(match.lastgroup[1:]) + 1
+                    found.add(indices[k - 1])
+        return found
     
     def classify_traffic(self, url):
         """
         Classify network traffic based on URL patterns
         Returns traffic type for APP ID detection
         """
-        url_lower = url.lower()
-        parsed = urlparse(url_lower)
-        full_path = f"{parsed.path}?{parsed.query}" if parsed.query else parsed.path
+        found = self._matched_patterns(url.lower())
         
         # Check for suspicious patterns first
-        if self._is_suspicious(url):
+        if not found.isdisjoint(self._suspicious_indices):
             return "Suspicious"
         
-        # Score each traffic type
-        scores = {}
-        for traffic_type, patterns in self.traffic_patterns.items():
-            score = 0
-            for pattern in patterns:
-                if re.search(pattern, url_lower):
-                    score += 1
-            scores[traffic_type] = score
+        # Score each traffic type by how many of its patterns matched
+        scores = dict.fromkeys(self.traffic_patterns, 0)
+        for i in found:
+            for traffic_type in self._pattern_categories[i]:
+                scores[traffic_type] += 1
         
         # Return the highest scoring type
         if max(scores.values()) > 0:
@@ -53,107 +197,141 @@ class TrafficAnalyzer:
         else:
             return "General Web"
     
+    def classify_many(self, urls):
+        """
+        Vectorized classify_traffic over a column of URLs
+        Distinct URLs are lowercased and joined by newlines into one text that each
+        pattern scans once; match positions map back to rows. No pattern can match a
+        newline, so a match never spans two URLs and a row matches exactly when
+        re.search on its URL would. The (N, n_types) score matrix is resolved by
+        argmax, whose first maximum is the same tie-break as classify_traffic
+        Returns a categorical Series aligned with urls
+        """
+        index = urls.index if isinstance(urls, pd.Series) else None
+        codes, uniques = pd.factorize(pd.Series(list(urls), dtype=object), use_na_sentinel=False)
+        lowered = [url.lower() for url in uniques]
+        text = '\n'.join(lowered)
+        starts = np.cumsum([0] + [len(url) + 1 for url in lowered[:-1]])
+        
+        scores = np.zeros((len(lowered), len(self.traffic_patterns)), dtype=np.int32)
+        suspicious = np.zeros(len(lowered), dtype=bool)
+        for i, pattern in enumerate(self._patterns):
+            positions = np.fromiter((match.start() for match in pattern.finditer(text)), dtype=np.int64)
+            if not len(positions):
+                continue
+            rows = np.unique(np.searchsorted(starts, positions, side='right') - 1)
+            scores[rows] += self._category_weights[i]
+            if i in self._suspicious_indices:
+                suspicious[rows] = True
+        
+        categories = list(self.traffic_patterns) + ["Suspicious", "General Web"]
+        labels = np.where(scores.max(axis=1, initial=0) > 0, scores.argmax(axis=1), len(categories) - 1)
+        labels[suspicious] = len(categories) - 2
+        return pd.Series(pd.Categorical.from_codes(labels[codes], categories), index=index)
+    
     def _is_suspicious(self, url):
         """
         Check for suspicious patterns that might indicate attacks
         """
-        suspicious_patterns = [
-            r'<script',
-            r'javascript:',
-            r'alert\(',
-            r'onerror=',
-            r'onload=',
-            r'union.*select',
-            r'drop.*table',
-            r'1=1',
-            r"'.*or.*'",
-            r'--|#',
-            r'\.\./',
-            r'%3C.*%3E',  # URL encoded < >
-            r'%27',       # URL encoded '
-            r'%22',       # URL encoded "
-        ]
-        
-        url_lower = url.lower()
-        for pattern in suspicious_patterns:
-            if re.search(pattern, url_lower):
-                return True
-        return False
+        return not self._matched_patterns(url.lower()).isdisjoint(self._suspicious_indices)
     
     def get_traffic_stats(self, urls):
         """
         Analyze traffic patterns for a list of URLs
         Returns comprehensive traffic statistics
         """
-        traffic_types = [self.classify_traffic(url) for url in urls]
-        
-        # Basic stats
-        unique_types = list(set(traffic_types))
-        type_counts = {t: traffic_types.count(t) for t in unique_types}
-        
-        # Suspicious traffic percentage
-        suspicious_count = traffic_types.count("Suspicious")
-        suspicious_percentage = (suspicious_count / len(urls)) * 100 if urls else 0
-        
-        return {
-            'total_requests': len(urls),
-            'unique_traffic_types': len(unique_types),
-            'traffic_distribution': type_counts,
-            'suspicious_traffic_count': suspicious_count,
-            'suspicious_traffic_percentage': suspicious_percentage,
-            'dominant_traffic_type': max(type_counts, key=type_counts.get) if type_counts else None
-        }
+        return TrafficStatsAccumulator(self).update(urls).stats()
     
-    def detect_anomalies(self, urls, threshold=0.1):
+    def detect_anomalies(self, urls, threshold=ANOMALY_THRESHOLD):
         """
         Detect traffic anomalies based on unusual patterns
         Implements part of Deliverable 2: Anomaly Identification
         """
-        anomalies = []
-        
-        for url in urls:
-            anomaly_score = 0
-            reasons = []
-            
-            # Check for unusual characters
-            unusual_chars = len(re.findall(r'[<>"\';(){}[\]\\]', url))
-            if unusual_chars > 5:
-                anomaly_score += 0.3
-                reasons.append(f"High unusual character count: {unusual_chars}")
-            
-            # Check for excessive URL encoding
-            encoded_chars = len(re.findall(r'%[0-9A-Fa-f]{2}', url))
-            if encoded_chars > 10:
-                anomaly_score += 0.2
-                reasons.append(f"Excessive URL encoding: {encoded_chars}")
-            
-            # Check for very long URLs
-            if len(url) > 500:
-                anomaly_score += 0.2
-                reasons.append(f"Very long URL: {len(url)} characters")
-            
-            # Check for suspicious keywords
-            suspicious_keywords = ['script', 'alert', 'drop', 'union', 'select', 'exec']
-            found_keywords = [kw for kw in suspicious_keywords if kw in url.lower()]
-            if found_keywords:
-                anomaly_score += 0.4
-                reasons.append(f"Suspicious keywords: {found_keywords}")
-            
-            # Check for multiple parameter injection attempts
-            param_injections = len(re.findall(r'[=&].*[<>\'";]', url))
-            if param_injections > 3:
-                anomaly_score += 0.3
-                reasons.append(f"Multiple parameter injections: {param_injections}")
-            
-            if anomaly_score >= threshold:
-                anomalies.append({
-                    'url': url,
-                    'anomaly_score': anomaly_score,
-                    'reasons': reasons,
-                    'severity': 'High' if anomaly_score > 0.7 else 'Medium' if anomaly_score > 0.4 else 'Low'
-                })
-        
-        return anomalies
+        urls = list(urls)
+        anomalies = self.score_anomalies(urls)
+        return [
+            {
+                'url': urls[i],
+                'anomaly_score': anomalies.scores[i].item(),
+                'reasons': self.anomaly_reasons(urls[i]),
+                'severity': anomalies.severity[i]
+            }
+            for i in np.flatnonzero(anomalies.scores >= threshold)
+        ]
+    
+    def score_anomalies(self, urls):
+        """
+        Columnar anomaly scoring: scores and severities of every URL as arrays
+        The five signals of detect_anomalies are computed for all distinct URLs at
+        once over the code points of their newline-joined text and added in the same
+        order, so scores are bit-identical; reasons are left to anomaly_reasons
+        for the rows a caller actually shows
+        """
+        codes, uniques = pd.factorize(pd.Series(list(urls), dtype=object), use_na_sentinel=False)
+        uniques = list(uniques)
+        lengths = np.fromiter(map(len, uniques), dtype=np.int64, count=len(uniques))
+        starts = np.cumsum(lengths + 1) - lengths - 1
+        chars = np.frombuffer('\n'.join(uniques).encode('utf-32-le', 'surrogatepass'), dtype=np.uint32)
+        
+        def per_url(mask):
+            totals = np.concatenate(([0], np.cumsum(mask)))
+            return totals[starts + lengths] - totals[starts]
+        
+        unusual_chars = per_url(np.isin(chars, _code_points(UNUSUAL_CHARS)))
+        # '%XY' matches cannot overlap (X and Y are never '%') or span the '\n' separator
+        is_hex = np.append(np.isin(chars, _code_points(HEX_DIGITS)), [False, False])
+        encoded_chars = per_url((chars == ord('%')) & is_hex[1:len(chars) + 1] & is_hex[2:])
+        
+        lowered = [url.lower() for url in uniques]
+        lowered_starts = np.cumsum([0] + [len(url) + 1 for url in lowered[:-1]])
+        positions = np.fromiter((m.start() for m in _KEYWORD_RE.finditer('\n'.join(lowered))), dtype=np.int64)
+        has_keywords = np.zeros(len(uniques), dtype=bool)
+        has_keywords[np.searchsorted(lowered_starts, positions, side='right') - 1] = True
+        
+        # The greedy '[=&].*[<>\'";]' matches at most once per line, so only URLs with
+        # at least four lines can exceed three parameter injections
+        param_injections = np.zeros(len(uniques), dtype=np.int64)
+        for i in np.flatnonzero(per_url(chars == ord('\n')) >= 3):
+            param_injections[i] = len(_PARAM_INJECTION_RE.findall(uniques[i]))
+        
+        scores = np.zeros(len(uniques))
+        scores += np.where(unusual_chars > 5, 0.3, 0.0)
+        scores += np.where(encoded_chars > 10, 0.2, 0.0)
+        scores += np.where(lengths > 500, 0.2, 0.0)
+        scores += np.where(has_keywords, 0.4, 0.0)
+        scores += np.where(param_injections > 3, 0.3, 0.0)
+        severity = np.where(scores > 0.7, 'High', np.where(scores > 0.4, 'Medium', 'Low')).astype(object)
+        return AnomalyScores(scores=scores[codes], severity=severity[codes])
+    
+    def anomaly_reasons(self, url):
+        """Human-readable reasons behind the anomaly score of one URL"""
+        reasons = []
+        
+        # Check for unusual characters
+        unusual_chars = len(re.findall(r'[<>"\';(){}[\]\\]', url))
+        if unusual_chars > 5:
+            reasons.append(f"High unusual character count: {unusual_chars}")
+        
+        # Check for excessive URL encoding
+        encoded_chars = len(re.findall(r'%[0-9A-Fa-f]{2}', url))
+        if encoded_chars > 10:
+            reasons.append(f"Excessive URL encoding: {encoded_chars}")
+        
+        # Check for very long URLs
+        if len(url) > 500:
+            reasons.append(f"Very long URL: {len(url)} characters")
+        
+        # Check for suspicious keywords
+        found_keywords = [kw for kw in ANOMALY_KEYWORDS if kw in url.lower()]
+        if found_keywords:
+            reasons.append(f"Suspicious keywords: {found_keywords}")
+        
+        # Check for multiple parameter injection attempts
+        param_injections = len(_PARAM_INJECTION_RE.findall(url))
+        if param_injections > 3:
+            reasons.append(f"Multiple parameter injections: {param_injections}")
+        
+        return reasons
     
     def generate_traffic_report(self, urls):
         """
@@ -204,4 +382,233 @@ class TrafficAnalyzer:
         if stats['suspicious_traffic_count'] == 0:
             recommendations.append("No immediate threats detected. Continue monitoring.")
         
-        return recommendations
\ No newline at end of file
+        return recommendations
+
+class TrafficStatsAccumulator:
+    """
+    Incremental get_traffic_stats over chunks of a URL stream
+    Only the per-type counts are kept, so memory stays constant however many URLs
+    pass through update(); accumulators filled by different workers combine with merge()
+    """
+
+    def __init__(self, analyzer=None):
+        self.analyzer = analyzer or TrafficAnalyzer()
+        self.total_requests = 0
+        self.type_counts = Counter()
+
+    def update(self, urls):
+        """Classify a chunk of URLs and add it to the running counts"""
+        traffic_types = self.analyzer.classify_many(urls)
+        self.total_requests += len(traffic_types)
+        for traffic_type, count in traffic_types.value_counts(sort=False).items():
+            if count:
+                self.type_counts[traffic_type] += int(count)
+        return self
+
+    def merge(self, other):
+        """Add the counts of another accumulator"""
+        self.total_requests += other.total_requests
+        self.type_counts.update(other.type_counts)
+        return self
+
+    @property
+    def suspicious_count(self):
+        return self.type_counts["Suspicious"]
+
+    @property
+    def dominant_traffic_type(self):
+        return max(self.type_counts, key=self.type_counts.get) if self.type_counts else None
+
+    def stats(self):
+        """The get_traffic_stats dict of everything seen so far"""
+        return {
+            'total_requests': self.total_requests,
+            'unique_traffic_types': len(self.type_counts),
+            'traffic_distribution': dict(self.type_counts),
+            'suspicious_traffic_count': self.suspicious_count,
+            'suspicious_traffic_percentage': (self.suspicious_count / self.total_requests) * 100 if self.total_requests else 0,
+            'dominant_traffic_type': self.dominant_traffic_type
+        }
+
+def _timestamp_seconds(timestamp):
+    """Epoch seconds of a number, datetime, datetime64 or timestamp string"""
+    if isinstance(timestamp, (int, float, np.integer, np.floating)):
+        return float(timestamp)
+    return pd.Timestamp(timestamp).timestamp()
+
+class _KeyState:
+    """Fixed-size sliding window and decayed counters of one host, path or client"""
+    __slots__ = ('counts', 'suspicious', 'novel', 'sketches', 'head', 'first_time', 'last_time',
+                 'decayed_count', 'decayed_suspicious', 'decayed_novel', 'quiet_until')
+
+    def __init__(self, n_buckets):
+        self.counts = [0] * n_buckets
+        self.suspicious = [0] * n_buckets
+        self.novel = [0] * n_buckets
+        self.sketches = [0] * n_buckets
+        self.head = None
+        self.first_time = None
+        self.last_time = None
+        self.decayed_count = 0.0
+        self.decayed_suspicious = 0.0
+        self.decayed_novel = 0.0
+        self.quiet_until = [-math.inf] * len(BEHAVIOR_SIGNALS)
+
+class BehaviorMonitor:
+    """
+    Streaming burst detection over timestamped requests
+    Every request updates the state of its host, its host+path and (when given) its
+    client. Each state keeps a sliding window as a ring buffer of time buckets
+    (request count, suspicious count, new payloads and a bitmap sketch of the
+    payloads seen) plus exponentially decayed long-run counters. A key is flagged
+    when its window shows a rate spike or a payload-diversity spike against its
+    decayed baseline, or a surge in the share of suspicious requests. States live in
+    an LRU of at most max_keys entries, so memory stays bounded for any key count
+    """
+
+    def __init__(self, analyzer=None, window_seconds=BEHAVIOR_WINDOW_SECONDS, n_buckets=BEHAVIOR_BUCKETS,
+                 half_life_seconds=BEHAVIOR_HALF_LIFE_SECONDS, max_keys=BEHAVIOR_MAX_KEYS,
+                 min_events=20, rate_factor=5.0, min_payloads=10, diversity_factor=5.0, surge_margin=0.3):
+        self.analyzer = analyzer or TrafficAnalyzer()
+        self.window_seconds = window_seconds
+        self.n_buckets = n_buckets
+        self.bucket_seconds = window_seconds / n_buckets
+        self.half_life_seconds = half_life_seconds
+        self.max_keys = max_keys
+        self.min_events = min_events
+        self.rate_factor = rate_factor
+        self.min_payloads = min_payloads
+        self.diversity_factor = diversity_factor
+        self.surge_margin = surge_margin
+        self._states = OrderedDict()
+        self.events = 0
+
+    def __len__(self):
+        return len(self._states)
+
+    def _state(self, key):
+        state = self._states.get(key)
+        if state is None:
+            state = self._states[key] = _KeyState(self.n_buckets)
+            while len(self._states) > self.max_keys:
+                self._states.popitem(last=False)
+        else:
+            self._states.move_to_end(key)
+        return state
+
+    def _update(self, state, t, payload_bit, suspicious):
+        """Add one request to a key's window and decayed counters; False if it is older than the window"""
+        bucket = int(t // self.bucket_seconds)
+        if state.head is None:
+            state.head = bucket
+        elif bucket > state.head:
+            # Clear the buckets the window slid past
+            for b in range(max(state.head + 1, bucket - self.n_buckets + 1), bucket + 1):
+                slot = b % self.n_buckets
+                state.counts[slot] = state.suspicious[slot] = state.novel[slot] = state.sketches[slot] = 0
+            state.head = bucket
+        elif bucket <= state.head - self.n_buckets:
+            return False
+
+        window_sketch = 0
+        for sketch in state.sketches:
+            window_sketch |= sketch
+        novel = not (window_sketch >> payload_bit) & 1
+        slot = bucket % self.n_buckets
+        state.counts[slot] += 1
+        state.suspicious[slot] += suspicious
+        state.novel[slot] += novel
+        state.sketches[slot] |= 1 << payload_bit
+
+        if state.last_time is None:
+            state.first_time = state.last_time = t
+        elif t > state.last_time:
+            decay = 0.5 ** ((t - state.last_time) / self.half_life_seconds)
+            state.decayed_count *= decay
+            state.decayed_suspicious *= decay
+            state.decayed_novel *= decay
+            state.last_time = t
+        state.decayed_count += 1
+        state.decayed_suspicious += suspicious
+        state.decayed_novel += novel
+        return True
+
+    def _check(self, state, t, scope, key):
+        """Alerts of a key's current window, each signal at most once per window"""
+        count = sum(state.counts)
+        suspicious = sum(state.suspicious)
+        novel = sum(state.novel)
+        # Long-run baseline without the window itself, so a burst does not mask itself
+        prior_count = max(state.decayed_count - count, 0.0)
+        prior_suspicious = max(state.decayed_suspicious - suspicious, 0.0)
+        prior_novel = max(state.decayed_novel - novel, 0.0)
+
+        # Decay-weighted time span the counters cover; young keys have not filled it yet
+        age = state.last_time - state.first_time
+        span = max(self.half_life_seconds / math.log(2) * (1 - 0.5 ** (age / self.half_life_seconds)),
+                   self.window_seconds)
+        expected_count = prior_count * self.window_seconds / span
+        expected_novel = prior_novel * self.window_seconds / span
+        prior_ratio = prior_suspicious / prior_count if prior_count >= 1 else 0.0
+        checks = (
+            (count >= self.min_events and count > self.rate_factor * max(expected_count, 1.0),
+             count, expected_count),
+            (novel >= self.min_payloads and novel > self.diversity_factor * max(expected_novel, 1.0),
+             novel, expected_novel),
+            (count >= self.min_events and suspicious / count - prior_ratio >= self.surge_margin,
+             suspicious / count if count else 0.0, prior_ratio)
+        )
+
+        alerts = []
+        for i, (flagged, value, baseline) in enumerate(checks):
+            if flagged and t >= state.quiet_until[i]:
+                state.quiet_until[i] = t + self.window_seconds
+                alerts.append(BehaviorAlert(t, scope, key, BEHAVIOR_SIGNALS[i], value, baseline))
+        return alerts
+
+    def observe(self, timestamp, url, suspicious=None, client=None):
+        """
+        Feed one request; returns the BehaviorAlerts it triggers
+        suspicious defaults to the analyzer's suspicious-pattern check of the URL
+        """
+        t = _timestamp_seconds(timestamp)
+        if suspicious is None:
+            suspicious = self.analyzer._is_suspicious(url)
+        try:
+            parts = urlsplit(url)
+            host, path, query = parts.netloc.lower(), parts.path or '/', parts.query
+        except ValueError:
+            host, path, query = '', url, ''
+        payload_bit = zlib.crc32(f"{path}?{query}".encode('utf-8', 'surrogatepass')) % PAYLOAD_SKETCH_BITS
+
+        keys = [('host', host), ('path', host + path)]
+        if client is not None:
+            keys.append(('client', client))
+        self.events += 1
+        alerts = []
+        for scope, key in keys:
+            state = self._state((scope, key))
+            if self._update(state, t, payload_bit, bool(suspicious)):
+                alerts.extend(self._check(state, t, scope, key))
+        return alerts
+
+    def observe_many(self, timestamps, urls, suspicious=None, clients=None):
+        """
+        Feed a block of requests in order; returns all BehaviorAlerts they trigger
+        Timestamps are parsed once for the block (naive ones as UTC) and requests
+        with a missing or unparseable timestamp are skipped. Suspicious flags
+        default to one classify_many call over the block
+        """
+        urls = list(urls)
+        if suspicious is None:
+            suspicious = self.analyzer.classify_many(urls).to_numpy(dtype=object) == "Suspicious"
+        times = pd.Series(list(timestamps))
+        if not pd.api.types.is_numeric_dtype(times):
+            times = pd.to_datetime(times, utc=True, errors='coerce')
+            times = (times - pd.Timestamp(0, tz='UTC')) / pd.Timedelta(seconds=1)
+        clients = [None] * len(urls) if clients is None else list(clients)
+        alerts = []
+        for t, url, flag, client in zip(times.to_numpy(dtype=float), urls, suspicious, clients):
+            if np.isfinite(t):
+                alerts.extend(self.observe(t, url, suspicious=bool(flag), client=client))
+        return alerts
@@ -0,0 +1,71 @@
+# utils/url_stream.py
+import gzip
+import io
+import os
+import pandas as pd
+from utils.feature_extraction import extract_features_batch
+
+GZIP_MAGIC = b'\x1f\x8b'
+
+def _source_name(source):
+    """Lowercased file name of a path or file-like object"""
+    if isinstance(source, (str, os.PathLike)):
+        return os.fspath(source).lower()
+    return str(getattr(source, 'name', '')).lower()
+
+def detect_format(source):
+    """'csv' for .csv / .csv.gz inputs, 'text' (one URL per line) otherwise"""
+    name = _source_name(source)
+    if name.endswith('.gz'):
+        name = name[:-3]
+    return 'csv' if name.endswith('.csv') else 'text'
+
+def open_binary(handle):
+    """
+    Readable binary stream over a seekable file-like object
+    Gzip input is detected from its magic bytes and decompressed on the fly
+    """
+    magic = handle.read(2)
+    handle.seek(-len(magic), io.SEEK_CUR)
+    if magic == GZIP_MAGIC:
+        return gzip.GzipFile(fileobj=handle)
+    return handle
+
+def iter_url_frames(source, block_size=10000, column='url', fmt=None):
+    """
+    Stream a CSV, newline-delimited text or gzip file as DataFrame blocks
+    Each block holds at most block_size rows and has a `column` of URLs
+    (plus the other CSV columns), so memory stays bounded for any input size
+    """
+    fmt = fmt or detect_format(source)
+    owned = isinstance(source, (str, os.PathLike))
+    raw = open(source, 'rb') if owned else source
+    handle = open_binary(raw)
+    try:
+        if fmt == 'csv':
+            for chunk in pd.read_csv(handle, chunksize=block_size):
+                if column not in chunk.columns:
+                    raise ValueError(f"CSV must contain a '{column}' column")
+                yield chunk.reset_index(drop=True)
+        else:
+            block = []
+            for line_bytes in handle:
+                line = line_bytes.decode('utf-8', errors='replace').strip()
+                if line:
+                    block.append(line)
+                if len(block) == block_size:
+                    yield pd.DataFrame({column: block})
+                    block = []
+            if block:
+                yield pd.DataFrame({column: block})
+    finally:
+        if owned:
+            raw.close()
+
+def iter_feature_blocks(source, block_size=10000, column='url', fmt=None, extract=extract_features_batch):
+    """
+    Stream (frame, features) pairs where features is the float32 feature matrix
+    of the block's URLs, computed with `extract` (NaN rows for unparseable URLs)
+    """
+    for frame in iter_url_frames(source, block_size=block_size, column=column, fmt=fmt):
+        yield frame, extract(frame[column])